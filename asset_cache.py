@@ -0,0 +1,71 @@
+import hashlib
+import math
+import os
+from pathlib import Path
+
+import numpy as np
+from manim import ImageMobject, config
+from PIL import Image
+
+# Pre-resized image assets.
+#
+# ImageMobject("assets/x.png").scale(0.4) decodes the full-size file on every
+# render, and the camera resamples the full-size pixels again on every frame
+# it draws. cached_image() builds the same mobject from pixels already resized
+# to the size the image has on screen at the current render resolution.
+#
+# Resized pixels are stored as .npy files keyed by the hash of the image file
+# and the target size, so later renders and other render processes skip
+# decoding and resizing altogether. They are loaded normally, not
+# memory-mapped: ImageMobject copies its pixels into an array of its own.
+
+CACHE_DIR = Path(os.environ.get("ASSET_CACHE_DIR", Path(__file__).resolve().parent / ".asset_cache"))
+# ImageMobject sizes images relative to this pixel height (its default
+# scale_to_resolution)
+REFERENCE_PIXEL_HEIGHT = 1080
+
+_digests = {}
+
+
+def _file_digest(path):
+    stat = os.stat(path)
+    memo_key = (str(path), stat.st_mtime_ns, stat.st_size)
+    if memo_key not in _digests:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        _digests[memo_key] = digest.hexdigest()
+    return _digests[memo_key]
+
+
+def _target_height(source_height, scale, reference_height):
+    # Pixel height of the image on screen at the current render quality
+    return max(1, math.ceil(scale * source_height * config.pixel_height / reference_height))
+
+
+def _resized_pixels(path, scale, reference_height):
+    # (RGBA pixels resized for the screen, pixel height of the original)
+    digest = _file_digest(path)
+    with Image.open(path) as image:
+        source_height = image.height
+        target_height = _target_height(source_height, scale, reference_height)
+        cached = CACHE_DIR / f"{digest}_{target_height}.npy"
+        if not cached.exists():
+            target_width = max(1, round(image.width * target_height / source_height))
+            pixels = np.asarray(
+                image.convert("RGBA").resize((target_width, target_height), Image.LANCZOS)
+            )
+            CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            tmp = cached.with_suffix(f".{os.getpid()}.tmp.npy")
+            np.save(tmp, pixels)
+            os.replace(tmp, cached)
+    return np.load(cached), source_height
+
+
+def cached_image(path, scale=1.0, **kwargs):
+    # Same size and position as ImageMobject(path, **kwargs).scale(scale)
+    reference_height = kwargs.get("scale_to_resolution", REFERENCE_PIXEL_HEIGHT)
+    pixels, source_height = _resized_pixels(path, scale, reference_height)
+    image = ImageMobject(pixels, **kwargs)
+    return image.scale(scale * source_height / pixels.shape[0])
@@ -0,0 +1,89 @@
+import argparse
+import time
+
+import numpy as np
+
+from retrieval import CosineIndex, CosineLSHIndex
+
+# Latency and recall benchmark for the retrieval indexes.
+#
+#   python bench_retrieval.py                    # 1M x 32 clustered catalog, top 10
+#   python bench_retrieval.py -n 2000000 --batch 16
+#   python bench_retrieval.py --data random      # isotropic vectors, no structure
+#
+# Builds each index over the same catalog and reports the build time and the
+# mean latency per query, for single queries and for batches. The recall of
+# CosineLSHIndex is the fraction of CosineIndex's exact top k it returns.
+
+
+def random_catalog(n, dim, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.standard_normal((n, dim)).astype(np.float32)
+
+
+def clustered_catalog(n, dim, seed=0, noise=0.3):
+    # Rows scattered around n // 100 random centres, like embeddings of
+    # items that fall into many small groups
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((max(1, n // 100), dim))
+    rows = centres[rng.integers(len(centres), size=n)]
+    return (rows + noise * rng.standard_normal((n, dim))).astype(np.float32)
+
+
+def time_queries(index, queries, k, batch):
+    # Mean seconds per query, answering `queries` `batch` at a time
+    index.query(queries[:batch], k=k)  # warm up
+    start = time.perf_counter()
+    results = [index.query(queries[i:i + batch], k=k)[0] for i in range(0, len(queries), batch)]
+    return (time.perf_counter() - start) / len(queries), np.concatenate(results)
+
+
+def recall(found, exact):
+    # Mean fraction of each row of `exact` that also appears in `found`
+    return np.mean([len(np.intersect1d(f, e)) / len(e) for f, e in zip(found, exact)])
+
+
+def benchmark_index(name, build, catalog, queries, k, batch):
+    start = time.perf_counter()
+    index = build(catalog)
+    build_seconds = time.perf_counter() - start
+    single, ids = time_queries(index, queries, k, 1)
+    batched, _ = time_queries(index, queries, k, batch)
+    print(f"{name:<16} build {build_seconds:6.2f} s   "
+          f"{single * 1000:7.2f} ms/query   {batched * 1000:7.2f} ms/query in batches of {batch}",
+          end="")
+    return ids
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the cosine retrieval indexes.")
+    parser.add_argument("-n", "--rows", type=int, default=1_000_000)
+    parser.add_argument("-d", "--dim", type=int, default=32)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("-q", "--queries", type=int, default=64)
+    parser.add_argument("--batch", type=int, default=16)
+    parser.add_argument("--data", choices=["clustered", "random"], default="clustered")
+    args = parser.parse_args(argv)
+
+    make_catalog = clustered_catalog if args.data == "clustered" else random_catalog
+    catalog = make_catalog(args.rows, args.dim)
+    # Queries are perturbed catalog rows, so they come from the same distribution
+    rng = np.random.default_rng(1)
+    queries = catalog[rng.integers(args.rows, size=args.queries)]
+    queries = queries + 0.1 * rng.standard_normal(queries.shape).astype(np.float32)
+    print(f"{args.rows} x {args.dim} {args.data} catalog, top {args.k}")
+
+    def build_lsh(rows):
+        index = CosineLSHIndex(args.dim)
+        index.add(rows)
+        index.query(rows[:1], k=1)  # sorts the hash tables, so it counts as build time
+        return index
+
+    exact = benchmark_index("CosineIndex", CosineIndex, catalog, queries, args.k, args.batch)
+    print()
+    found = benchmark_index("CosineLSHIndex", build_lsh, catalog, queries, args.k, args.batch)
+    print(f"   recall@{args.k} {recall(found, exact):.2f}")
+
+
+if __name__ == "__main__":
+    main()
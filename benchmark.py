@@ -0,0 +1,235 @@
+import argparse
+import json
+import multiprocessing
+import platform
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+
+from render_all import QUALITIES, ROOT, _prepare_process, discover_scenes
+
+# Render benchmark for every scene in the four scene modules.
+#
+#   python benchmark.py -o bench.json                   # record
+#   python benchmark.py --compare bench.json            # record and compare
+#   python benchmark.py --compare bench.json --results new.json   # compare only
+#
+# Each scene is rendered on its own in a fresh process at a fixed quality,
+# with manim's partial-movie cache disabled. Recorded per scene:
+#   - wall time of the whole render,
+#   - every self.play / self.wait call with its source line and duration,
+#   - the number of mobjects on screen after each call, and the maximum,
+#   - time spent building Text and LaTeX mobjects,
+#   - the peak resident set size of the process.
+# Compare mode flags scenes whose time or memory grew by more than the
+# tolerance relative to the baseline, and exits non-zero if any did.
+
+DEFAULT_QUALITY = "low_quality"
+DEFAULT_TOLERANCE = 0.25
+# Differences below these are noise, whatever the ratio
+MIN_SECONDS = 0.5
+MIN_RSS_MB = 20.0
+
+# (field, minimum difference) checked by --compare
+COMPARED_FIELDS = [
+    ("wall", MIN_SECONDS),
+    ("play_seconds", MIN_SECONDS),
+    ("wait_seconds", MIN_SECONDS),
+    ("tex_seconds", MIN_SECONDS),
+    ("text_seconds", MIN_SECONDS),
+    ("peak_rss_mb", MIN_RSS_MB),
+]
+
+
+def _caller_line(scene_file):
+    # (function, line) of the innermost frame in the scene's source file
+    frame = sys._getframe(2)
+    while frame is not None:
+        if frame.f_code.co_filename == scene_file:
+            return frame.f_code.co_name, frame.f_lineno
+        frame = frame.f_back
+    return None, None
+
+
+@contextmanager
+def _patched(cls, name, wrapper):
+    original = getattr(cls, name)
+    setattr(cls, name, wrapper(original))
+    try:
+        yield
+    finally:
+        setattr(cls, name, original)
+
+
+def _timed_build(totals, kind):
+    # Wraps a mobject __init__; nested builds (MathTex -> SingleStringMathTex)
+    # are counted once
+    def wrapper(original):
+        def __init__(self, *args, **kwargs):
+            if totals["depth"]:
+                return original(self, *args, **kwargs)
+            totals["depth"] += 1
+            start = time.perf_counter()
+            try:
+                return original(self, *args, **kwargs)
+            finally:
+                totals["depth"] -= 1
+                totals[f"{kind}_seconds"] += time.perf_counter() - start
+                totals[f"{kind}_count"] += 1
+        return __init__
+    return wrapper
+
+
+def _timed_call(records, kind, scene_file):
+    # Scene.wait plays a Wait animation; only the outer call is recorded
+    def wrapper(original):
+        def method(self, *args, **kwargs):
+            if records["depth"]:
+                return original(self, *args, **kwargs)
+            function, line = _caller_line(scene_file)
+            scene_time = self.renderer.time
+            records["depth"] += 1
+            start = time.perf_counter()
+            try:
+                result = original(self, *args, **kwargs)
+            finally:
+                records["depth"] -= 1
+            record = {
+                "function": function,
+                "line": line,
+                "seconds": time.perf_counter() - start,
+                "scene_seconds": self.renderer.time - scene_time,
+                "mobjects": len(self.get_mobject_family_members()),
+            }
+            if kind == "play":
+                record["animations"] = [type(arg).__name__ for arg in args]
+            records[kind].append(record)
+            return result
+        return method
+    return wrapper
+
+
+def benchmark_scene(scene_id, quality, media_dir):
+    # Runs in a fresh worker process. Returns the measurements of one render.
+    _prepare_process()
+    import importlib
+    import inspect
+
+    from manim import MathTex, Scene, SingleStringMathTex, Text, tempconfig
+
+    module_name, class_name = scene_id.rsplit(".", 1)
+    scene_cls = getattr(importlib.import_module(module_name), class_name)
+    scene_file = inspect.getfile(scene_cls)
+
+    records = {"depth": 0, "play": [], "wait": []}
+    totals = {"depth": 0, "tex_seconds": 0.0, "tex_count": 0, "text_seconds": 0.0, "text_count": 0}
+    with tempconfig({
+        "quality": quality,
+        "media_dir": str(media_dir),
+        "disable_caching": True,
+        "progress_bar": "none",
+        "verbosity": "WARNING",
+    }), \
+            _patched(Scene, "play", _timed_call(records, "play", scene_file)), \
+            _patched(Scene, "wait", _timed_call(records, "wait", scene_file)), \
+            _patched(Text, "__init__", _timed_build(totals, "text")), \
+            _patched(MathTex, "__init__", _timed_build(totals, "tex")), \
+            _patched(SingleStringMathTex, "__init__", _timed_build(totals, "tex")):
+        start = time.perf_counter()
+        scene = scene_cls()
+        scene.render()
+        wall = time.perf_counter() - start
+
+    del totals["depth"]
+    return {
+        "wall": wall,
+        "play_seconds": sum(r["seconds"] for r in records["play"]),
+        "wait_seconds": sum(r["seconds"] for r in records["wait"]),
+        **totals,
+        "max_mobjects": max((r["mobjects"] for r in records["play"] + records["wait"]), default=0),
+        # ru_maxrss is in kilobytes on Linux
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "play": records["play"],
+        "wait": records["wait"],
+    }
+
+
+def run_benchmark(scene_ids=None, quality=DEFAULT_QUALITY):
+    import manim
+
+    found = discover_scenes()
+    scene_ids = scene_ids or list(found)
+    results = {
+        "quality": quality,
+        "manim": manim.__version__,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "scenes": {},
+    }
+    # spawn, so each scene's peak RSS only counts its own render
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as media_dir:
+        for scene_id in scene_ids:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                result = pool.submit(benchmark_scene, scene_id, quality, media_dir).result()
+            results["scenes"][scene_id] = result
+            print(f"  {scene_id}: {result['wall']:.1f}s, peak {result['peak_rss_mb']:.0f} MB")
+    return results
+
+
+def compare(baseline, current, tolerance=DEFAULT_TOLERANCE):
+    # [(scene, field, baseline value, current value)] for every regression
+    regressions = []
+    for scene_id, now in current["scenes"].items():
+        before = baseline["scenes"].get(scene_id)
+        if before is None:
+            continue
+        for field, min_diff in COMPARED_FIELDS:
+            old, new = before.get(field), now.get(field)
+            if old is None or new is None:
+                continue
+            if new - old > min_diff and new > old * (1 + tolerance):
+                regressions.append((scene_id, field, old, new))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the render time of every scene.")
+    parser.add_argument("-q", "--quality", choices=sorted(QUALITIES), default="l")
+    parser.add_argument("--scenes", nargs="+", default=None, help="only these scenes (module.Class)")
+    parser.add_argument("-o", "--output", default=None, help="write the results to this JSON file")
+    parser.add_argument("--compare", default=None, help="baseline JSON file to compare against")
+    parser.add_argument("--results", default=None,
+                        help="compare these stored results instead of running the benchmark")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed relative growth before a change counts as a regression")
+    args = parser.parse_args(argv)
+
+    if args.results:
+        current = json.loads(Path(args.results).read_text())
+    else:
+        current = run_benchmark(args.scenes, QUALITIES[args.quality])
+        output = args.output or ROOT / "bench_output.json"
+        Path(output).write_text(json.dumps(current, indent=2))
+        print(f"Wrote {output}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        if baseline.get("quality") != current.get("quality"):
+            print(f"warning: baseline quality {baseline.get('quality')} differs from {current.get('quality')}")
+        regressions = compare(baseline, current, args.tolerance)
+        for scene_id, field, old, new in regressions:
+            # A zero baseline (e.g. tex_seconds of a scene without LaTeX) has no ratio
+            ratio = f"{new / old:.2f}x" if old else "new"
+            print(f"REGRESSION {scene_id} {field}: {old:.2f} -> {new:.2f} ({ratio})")
+        if regressions:
+            sys.exit(1)
+        print("No regressions")
+
+
+if __name__ == "__main__":
+    main()
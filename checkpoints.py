@@ -0,0 +1,257 @@
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from manim import config, logger
+
+from render_cache import _file_digest, scene_cache_key
+
+# Checkpoints of a sectioned scene, for resuming a render mid-scene.
+#
+# After each section, SectionCheckpoints stores the state of the scene: the
+# mobjects on screen, the named attributes later sections use, the scene time,
+# the number of play calls and the partial movies written so far. A checkpoint
+# is keyed like the render cache, but only on the sections played before it,
+# so editing "takeaways" keeps every earlier checkpoint valid.
+#
+# resume() restores the latest checkpoint whose key still matches. The scene
+# then plays only the sections after it; the partial movies stored with the
+# checkpoint stand in for the skipped play calls when manim joins the movie.
+#
+#   checkpoints = SectionCheckpoints(self, names, ["title"])
+#   for name in names[checkpoints.resume():]:
+#       getattr(self, f"{name}_section")()
+#       checkpoints.save(name)
+#
+# States that cannot be pickled (e.g. mobjects with lambda updaters) are not
+# saved, and the scene is played from an earlier checkpoint instead.
+#
+# Storage stays bounded:
+#   - partial movies go into a shared segments/ directory under the hash of
+#     their content, so each one is stored once however many checkpoints use
+#     it, and a checkpoint only adds the partial movies of its own section.
+#     Segments are hard-linked where manim won't rewrite the file in place,
+#   - per scene and section only the KEEP_PER_SECTION most recently used keys
+#     are kept; older ones were superseded by an edit,
+#   - past MAX_BYTES the least recently used checkpoints are evicted, and
+#     segments no checkpoint refers to are deleted.
+# Pruning walks the whole store, so it runs once per scene, after the last
+# section, and only if the render added a checkpoint.
+
+CHECKPOINT_DIR = Path(os.environ.get("SCENE_CHECKPOINT_DIR", Path(__file__).resolve().parent / ".checkpoints"))
+MAX_BYTES = 5 * 1024 ** 3
+KEEP_PER_SECTION = 2
+SEGMENTS = "segments"
+# Unreferenced segments younger than this may belong to a checkpoint that
+# another process is saving right now
+SEGMENT_GRACE_SECONDS = 600
+
+
+def _partial_movie_files(writer):
+    # writer.partial_movie_files is the list manim indexes by play call and
+    # joins into the movie; each section keeps its own copy of its part
+    return list(writer.partial_movie_files)
+
+
+def _set_partial_movie_files(writer, paths):
+    # Both lists get the restored paths, so later play calls append after
+    # them. Scenes here write a single manim section.
+    writer.partial_movie_files = list(paths)
+    sections = getattr(writer, "sections", None)
+    if sections:
+        sections[-1].partial_movie_files = list(paths)
+
+
+def _stat(path):
+    try:
+        return path.stat()
+    except FileNotFoundError:
+        return None  # removed by another process meanwhile
+
+
+def _segment_names(checkpoint):
+    try:
+        return json.loads((checkpoint / "segments.json").read_text())
+    except (OSError, ValueError):
+        return []
+
+
+def prune(directory=CHECKPOINT_DIR, max_bytes=MAX_BYTES, keep=KEEP_PER_SECTION):
+    # Drop superseded and least recently used checkpoints, then the segments
+    # no checkpoint refers to
+    directory = Path(directory)
+    segments = directory / SEGMENTS
+    checkpoints = []
+    scene_dirs = [path for path in directory.iterdir() if path.is_dir() and path.name != SEGMENTS]
+    for slot in [path for scene_dir in scene_dirs for path in scene_dir.iterdir() if path.is_dir()]:
+        entries = [(_stat(path), path) for path in slot.iterdir() if path.suffix != ".tmp"]
+        entries = sorted(((stat.st_mtime, path) for stat, path in entries if stat), reverse=True)
+        for _, path in entries[keep:]:
+            shutil.rmtree(path, ignore_errors=True)
+        checkpoints += entries[:keep]
+
+    sizes = {}
+    for path in segments.glob("*") if segments.exists() else []:
+        stat = _stat(path)
+        if stat:
+            sizes[path.name] = stat.st_size
+    # Most recently used first; each checkpoint costs its state and the
+    # segments not already counted for a more recent one
+    checkpoints.sort(reverse=True)
+    referenced = set()
+    total = 0
+    for index, (_, path) in enumerate(checkpoints):
+        new = set(_segment_names(path)) - referenced
+        state = _stat(path / "state.pkl")
+        size = sum(sizes.get(name, 0) for name in new) + (state.st_size if state else 0)
+        if index and total + size > max_bytes:
+            shutil.rmtree(path, ignore_errors=True)
+            continue
+        referenced |= new
+        total += size
+
+    cutoff = time.time() - SEGMENT_GRACE_SECONDS
+    for name in set(sizes) - referenced:
+        stat = _stat(segments / name)
+        if stat and stat.st_mtime < cutoff:
+            (segments / name).unlink(missing_ok=True)
+
+
+class SectionCheckpoints:
+    def __init__(self, scene, sections, attributes=(), directory=CHECKPOINT_DIR):
+        self.scene = scene
+        self.sections = list(sections)
+        self.attributes = list(attributes)
+        self.directory = Path(directory)
+        # Segment names of partial movies already stored, by (path, size, mtime)
+        self._stored = {}
+        # Whether this render added a checkpoint; the store is pruned once,
+        # after the last section, and only then
+        self._added = False
+        # Chunked renders play only part of the timeline; their partial movies
+        # must not be stored or replaced
+        self.enabled = getattr(scene, "use_checkpoints", True) and config.write_to_movie
+        self._settings = {
+            "pixel_width": config.pixel_width,
+            "pixel_height": config.pixel_height,
+            "frame_rate": config.frame_rate,
+            "extension": config.movie_file_extension,
+            "random_seed": scene.random_seed,
+        }
+
+    def _path(self, done):
+        key = scene_cache_key(type(self.scene), self._settings, sections=set(self.sections[:done]),
+                              renderer_cls=type(self.scene.renderer))
+        slot = f"{done:02d}_{self.sections[done - 1]}"
+        return self.directory / type(self.scene).__name__ / slot / key
+
+    def _store_segment(self, movie):
+        # Name of `movie` in the segments directory, adding it if needed
+        movie = Path(movie)
+        segments = self.directory / SEGMENTS
+        if movie.parent == segments:
+            name = movie.name  # restored from a checkpoint
+        else:
+            stat = movie.stat()
+            memo_key = (str(movie), stat.st_size, stat.st_mtime_ns)
+            if memo_key not in self._stored:
+                self._stored[memo_key] = _file_digest(movie) + movie.suffix
+            name = self._stored[memo_key]
+        target = segments / name
+        if target.exists():
+            os.utime(target)  # keeps it from being collected while in use
+            return name
+        segments.mkdir(parents=True, exist_ok=True)
+        tmp = segments / f"{name}.{os.getpid()}.tmp"
+        try:
+            # manim rewrites uncached partial movies in place, so those are copied
+            if movie.name.startswith("uncached_"):
+                raise OSError
+            os.link(movie, tmp)
+        except OSError:
+            shutil.copyfile(movie, tmp)
+        os.replace(tmp, target)
+        return name
+
+    def save(self, section):
+        # Store the state after `section`. Returns whether a checkpoint exists.
+        if not self.enabled:
+            return False
+        saved = self._save(section)
+        if self._added and section == self.sections[-1]:
+            prune(self.directory)
+            self._added = False
+        return saved
+
+    def _save(self, section):
+        path = self._path(self.sections.index(section) + 1)
+        if path.exists():
+            os.utime(path)
+            return True
+        renderer = self.scene.renderer
+        movies = _partial_movie_files(renderer.file_writer)
+        if len(movies) != renderer.num_plays or None in movies:
+            return False  # some play calls were skipped, nothing to resume from
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = Path(tempfile.mkdtemp(dir=path.parent, suffix=".tmp"))
+        try:
+            segments = [self._store_segment(movie) for movie in movies]
+            state = {
+                "mobjects": self.scene.mobjects,
+                "foreground_mobjects": self.scene.foreground_mobjects,
+                "attributes": {name: getattr(self.scene, name) for name in self.attributes},
+                "time": renderer.time,
+                "num_plays": renderer.num_plays,
+                "segments": segments,
+                # Static holds noted so far (StaticHoldRenderer)
+                "holds": getattr(renderer, "holds", None),
+            }
+            # One dump keeps attributes and on-screen mobjects the same objects
+            with open(tmp / "state.pkl", "wb") as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            # Readable without unpickling the scene, for prune()
+            (tmp / "segments.json").write_text(json.dumps(segments))
+            os.rename(tmp, path)
+        except (OSError, pickle.PicklingError, TypeError, AttributeError) as error:
+            logger.info(f"Not saving checkpoint after {section}: {error}")
+            shutil.rmtree(tmp, ignore_errors=True)
+            return path.exists()  # another process may have saved it meanwhile
+        self._added = True
+        return True
+
+    def resume(self):
+        # Restore the latest valid checkpoint. Returns the index of the first
+        # section still to play (0 if there is nothing to resume from).
+        if not self.enabled:
+            return 0
+        for done in range(len(self.sections), 0, -1):
+            path = self._path(done)
+            try:
+                with open(path / "state.pkl", "rb") as f:
+                    state = pickle.load(f)
+            except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+                continue
+            os.utime(path)
+            self._restore(state)
+            logger.info(f"Resuming {type(self.scene).__name__} after {self.sections[done - 1]}")
+            return done
+        return 0
+
+    def _restore(self, state):
+        scene = self.scene
+        scene.clear()
+        scene.add(*state["mobjects"])
+        scene.add_foreground_mobjects(*state["foreground_mobjects"])
+        for name, value in state["attributes"].items():
+            setattr(scene, name, value)
+        scene.renderer.time = state["time"]
+        scene.renderer.num_plays = state["num_plays"]
+        if state["holds"] is not None and hasattr(scene.renderer, "holds"):
+            scene.renderer.holds = list(state["holds"])
+        segments = self.directory / SEGMENTS
+        _set_partial_movie_files(scene.renderer.file_writer, [str(segments / name) for name in state["segments"]])
@@ -0,0 +1,143 @@
+import hashlib
+import importlib
+import json
+
+from hold_timing import manifest_path, write_manifest
+from tex_batch import worker_tex_dir
+
+# Rendering one long scene in several processes.
+#
+# A scene's timeline is split into N chunks of consecutive play/wait calls
+# with about the same number of frames each. Every chunk is rendered by its
+# own worker with manim's from_animation_number / upto_animation_number:
+# the calls before the chunk are run with animations skipped, which brings
+# every mobject to its end state without drawing or encoding a frame, and
+# the worker stops after the chunk's last call. The chunk movies start on a
+# keyframe and share the encoder settings, so they are joined by stream copy.
+#
+# For this to give the same frames as a single render, each chunk must build
+# exactly the same scene: every render seeds `random` and `np.random` from the
+# scene id (scene_seed) before construct runs. Updaters that depend on dt see
+# one large step for skipped calls instead of one per frame.
+
+# Long single-timeline scenes that render_all splits into chunks
+CHUNKED_SCENES = {
+    "euclidean_distance.EuclideanDistanceVisualization",
+    "manhattan.CombinedManhattanScene",
+}
+
+
+def scene_seed(scene_id):
+    # Stable across processes and runs, unlike hash()
+    return int.from_bytes(hashlib.sha256(scene_id.encode()).digest()[:4], "little")
+
+
+def _scene_class(scene_id):
+    module_name, class_name = scene_id.rsplit(".", 1)
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def play_frames(scene_id, quality, media_dir):
+    # Number of frames of every play/wait call of the scene, found by running
+    # construct with all animations skipped
+    from render_all import _prepare_process
+
+    _prepare_process()
+    from manim import tempconfig
+    from manim.renderer.cairo_renderer import CairoRenderer
+
+    frames = []
+
+    class CountingRenderer(CairoRenderer):
+        def play(self, scene, *args, **kwargs):
+            super().play(scene, *args, **kwargs)
+            frames.append(round(scene.duration * self.camera.frame_rate))
+
+    with worker_tex_dir(media_dir) as tex_dir, tempconfig({
+        "quality": quality,
+        "media_dir": str(media_dir),
+        "tex_dir": str(tex_dir),
+        "write_to_movie": False,
+        "disable_caching": True,
+        "progress_bar": "none",
+        "verbosity": "WARNING",
+    }):
+        scene = _scene_class(scene_id)(renderer=CountingRenderer(skip_animations=True),
+                                       random_seed=scene_seed(scene_id))
+        scene.render()
+    return frames
+
+
+def plan_chunks(frames, n_chunks):
+    # [(first, last)] inclusive play indices of up to n_chunks consecutive
+    # ranges with about the same number of frames each
+    n_chunks = max(1, min(n_chunks, len(frames)))
+    total = sum(frames)
+    ranges = []
+    first = 0
+    done = 0
+    for index, count in enumerate(frames):
+        done += count
+        remaining_plays = len(frames) - index - 1
+        remaining_chunks = n_chunks - len(ranges) - 1
+        if remaining_chunks and (done >= total * (len(ranges) + 1) / n_chunks
+                                 or remaining_plays == remaining_chunks):
+            ranges.append((first, index))
+            first = index + 1
+    ranges.append((first, len(frames) - 1))
+    return ranges
+
+
+def render_chunk(scene_id, quality, media_dir, index, first, last):
+    # Runs in a worker process. Returns (scene_id, index, path of the chunk movie).
+    from render_all import _prepare_process
+
+    _prepare_process()
+    from manim import tempconfig
+
+    from static_holds import StaticHoldRenderer
+
+    scene_cls = _scene_class(scene_id)
+    with worker_tex_dir(media_dir) as tex_dir, tempconfig({
+        "quality": quality,
+        "media_dir": str(media_dir),
+        "tex_dir": str(tex_dir),
+        "output_file": f"{scene_cls.__name__}_chunk{index:03d}",
+        # The default directory is named after the scene class alone; chunks
+        # rendering at the same time would share (and join, and clean) each
+        # other's partial movies
+        "partial_movie_dir": f"{{video_dir}}/partial_movie_files/{{scene_name}}_chunk{index:03d}",
+        "from_animation_number": first,
+        "upto_animation_number": last,
+        "progress_bar": "none",
+        "verbosity": "WARNING",
+    }):
+        scene = scene_cls(renderer=StaticHoldRenderer(), random_seed=scene_seed(scene_id))
+        # A chunk has no partial movies for the calls before it
+        scene.use_checkpoints = False
+        scene.render()
+        renderer = scene.renderer
+        movie = renderer.file_writer.movie_file_path
+        # Skipped calls before the chunk are recorded too; keep the chunk's own.
+        # Start frames count from the start of the whole scene.
+        holds = [hold for hold in renderer.holds if first <= hold["play"] <= last]
+        fps = renderer.camera.frame_rate
+        write_manifest(movie, holds, fps, frames=round(renderer.time * fps))
+        return scene_id, index, str(movie)
+
+
+def merge_hold_manifests(chunk_movies, movie):
+    # Hold manifest of the stitched movie. Hold start frames count from the
+    # start of the scene's timeline, so they carry over unchanged.
+    holds = []
+    fps = frames = None
+    for chunk in chunk_movies:
+        path = manifest_path(chunk)
+        if path.exists():
+            manifest = json.loads(path.read_text())
+            fps = manifest["fps"]
+            # Counted from the start of the scene too: the last chunk's is the total
+            frames = manifest.get("frames")
+            holds.extend(manifest["holds"])
+    if fps is not None:
+        write_manifest(movie, holds, fps, frames=frames)
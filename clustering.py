@@ -0,0 +1,91 @@
+from collections import namedtuple
+
+import numpy as np
+
+from distances import BATCH_ELEMENTS, pairwise_distances
+
+# Nearest-centre assignment and k-medians clustering.
+# Points are processed in chunks, so memory stays at one (chunk x K) distance
+# block no matter how many points there are.
+
+KMediansResult = namedtuple("KMediansResult", ["centers", "labels", "distances", "n_iter"])
+
+
+def assign_to_nearest(points, centers, metric="manhattan", ties="first", chunk_size=None):
+    # Returns (labels, distances): the index of the nearest centre for every
+    # point and the distance to it. `ties` picks the "first" or "last" of
+    # several equally near centres.
+    if ties not in ("first", "last"):
+        raise ValueError("ties must be 'first' or 'last'")
+    points = np.atleast_2d(np.asarray(points, dtype=float))
+    centers = np.atleast_2d(np.asarray(centers, dtype=float))
+    n_centers = len(centers)
+    if chunk_size is None:
+        chunk_size = max(1, BATCH_ELEMENTS // (n_centers * points.shape[1]))
+    search_centers = centers[::-1] if ties == "last" else centers
+
+    labels = np.empty(len(points), dtype=np.intp)
+    distances = np.empty(len(points))
+    for start in range(0, len(points), chunk_size):
+        block = pairwise_distances(points[start:start + chunk_size], search_centers, metric=metric)
+        nearest = np.argmin(block, axis=1)
+        distances[start:start + chunk_size] = block[np.arange(len(block)), nearest]
+        labels[start:start + chunk_size] = nearest
+    if ties == "last":
+        labels = n_centers - 1 - labels
+    return labels, distances
+
+
+def cluster_medians(points, labels, n_clusters, previous=None):
+    # Coordinate-wise median of every cluster, one sort per dimension.
+    # Empty clusters keep their previous centre (or NaN without one).
+    points = np.asarray(points, dtype=float)
+    counts = np.bincount(labels, minlength=n_clusters)
+    starts = np.cumsum(counts) - counts
+    filled = counts > 0
+    lower = (starts + (counts - 1) // 2)[filled]
+    upper = (starts + counts // 2)[filled]
+
+    if previous is None:
+        medians = np.full((n_clusters, points.shape[1]), np.nan)
+    else:
+        medians = np.array(previous, dtype=float)
+    for dim in range(points.shape[1]):
+        column = points[:, dim]
+        ordered = column[np.lexsort((column, labels))]
+        medians[filled, dim] = 0.5 * (ordered[lower] + ordered[upper])
+    return medians
+
+
+def k_medians(points, n_clusters=None, init=None, max_iter=100, tol=0.0, seed=0, chunk_size=None):
+    # L1 clustering: assign every point to its nearest centre by Manhattan
+    # distance, move each centre to the coordinate-wise median of its points,
+    # repeat until the assignment stops changing or the centres move by at
+    # most `tol`. Pass initial centres as `init` or a cluster count to sample
+    # them from the points.
+    points = np.atleast_2d(np.asarray(points, dtype=float))
+    if init is not None:
+        centers = np.array(init, dtype=float)
+    elif n_clusters is not None:
+        rng = np.random.default_rng(seed)
+        centers = points[rng.choice(len(points), size=n_clusters, replace=False)].copy()
+    else:
+        raise ValueError("pass either n_clusters or init centres")
+    n_clusters = len(centers)
+
+    labels = None
+    for n_iter in range(1, max_iter + 1):
+        new_labels, distances = assign_to_nearest(points, centers, chunk_size=chunk_size)
+        if labels is not None and np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+        new_centers = cluster_medians(points, labels, n_clusters, previous=centers)
+        shift = np.abs(new_centers - centers).sum(axis=1).max()
+        centers = new_centers
+        if shift <= tol:
+            labels, distances = assign_to_nearest(points, centers, chunk_size=chunk_size)
+            break
+    else:
+        # Out of iterations: report the assignment for the final centres
+        labels, distances = assign_to_nearest(points, centers, chunk_size=chunk_size)
+    return KMediansResult(centers, labels, distances, n_iter)
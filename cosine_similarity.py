@@ -1,5 +1,9 @@
 from manim import *
 
+from asset_cache import cached_image
+from distances import cosine_similarity
+from retrieval import CosineIndex, CosineLSHIndex
+
 class CosineSimilarityTitle(Scene):
     def construct(self):
         # Scene 1: Title
@@ -263,6 +267,7 @@ class CosineSimilarityExample(Scene):
         magnitudes.move_to(calc_position)
         
         # Step 3: Final calculation
+        cos_value = cosine_similarity(vec_A_value, vec_B_value)
         cosine_calc = MathTex(
             r"\text{\small Cosine Similarity:}" + \
             r"\\" + \
@@ -272,7 +277,7 @@ class CosineSimilarityExample(Scene):
             r"\\" + \
             r"&= \frac{11}{5\sqrt{5}}" + \
             r"\\" + \
-            r"&\approx 0.983"
+            rf"&\approx {cos_value:.3f}"
         )
         cosine_calc.scale(0.9) 
         cosine_calc.move_to(calc_position)
@@ -407,6 +412,9 @@ class CosineSimilarityInterpretation(Scene):
 
 
 class CosineSimilarityMusicRec(Scene):
+    # Switch to the approximate LSH index for catalogs too large to scan exactly
+    use_approximate_index = False
+
     def construct(self):
         # Scene 5: Music Recommendation Example
         title = Text("Cosine Similarity for Recommendation Systems", font_size=40).to_edge(UP)
@@ -509,8 +517,17 @@ class CosineSimilarityMusicRec(Scene):
         
         self.play(Create(grid), Create(axes))
         
+        # Catalog of songs plotted in the 2-D music space, with where each album cover sits
+        song_catalog = [
+            {"vector": (2.5, 2), "image": "assets/starboy.png", "image_offset": [0.6, 0.6, 0]},
+            {"vector": (3, 1), "image": "assets/tameimpala.png", "image_offset": [0.6, 0.2, 0]},
+            {"vector": (-2.5, -1.5), "image": "assets/beethoven.jpeg", "image_offset": [-0.7, -0.2, 0]},
+        ]
+        profile_value = (2, 1.5)
+        num_recommendations = 2
+
         # Create profile vector
-        profile_vector = Arrow(axes.coords_to_point(0, 0), axes.coords_to_point(2, 1.5), 
+        profile_vector = Arrow(axes.coords_to_point(0, 0), axes.coords_to_point(*profile_value), 
                              buff=0, color=BLUE, stroke_width=6, max_tip_length_to_length_ratio=0.2)
         profile_label = Text("Song Profile", font_size=28, color=BLUE)
         
@@ -521,73 +538,45 @@ class CosineSimilarityMusicRec(Scene):
         self.play(Create(profile_vector), Write(profile_label))
         self.wait(5)  # Increased pause after profile vector appears
         
-        # Create similar song vectors with album art images
-        similar_vectors = VGroup()
-        similar_images = Group()  # Changed to Group since ImageMobject isn't a VMobject
-        similar_check_marks = VGroup()
-        
-        # Define points and image paths (only 2 pop songs)
-        similar_points = [(2.5, 2), (3, 1)]  # Just 2 points for pop songs
-        similar_image_paths = [
-            "assets/starboy.png",  # Updated file extension to match actual file
-            "assets/tameimpala.png"  # Updated file extension to match actual file
-        ]
-        
-        # Create arrows and images for similar songs
-        for i, (point, img_path) in enumerate(zip(similar_points, similar_image_paths)):
-            # Create vector arrow
+        # Ask the retrieval engine which songs are closest in direction to the profile
+        song_vectors = [song["vector"] for song in song_catalog]
+        if self.use_approximate_index:
+            song_index = CosineLSHIndex(dim=len(profile_value))
+            song_index.add(song_vectors)
+        else:
+            song_index = CosineIndex(song_vectors)
+        similar_ids, _ = song_index.query(profile_value, k=num_recommendations)
+        recommended = set(similar_ids.tolist())
+        different_ids = [i for i in range(len(song_catalog)) if i not in recommended]
+        
+        def song_arrow_and_image(song, color):
             vec = Arrow(
                 start=axes.coords_to_point(0, 0),
-                end=axes.coords_to_point(*point),
+                end=axes.coords_to_point(*song["vector"]),
                 buff=0, 
-                color=GREEN,
+                color=color,
                 stroke_width=5,
                 max_tip_length_to_length_ratio=0.2
             )
+            # Load and position actual image next to the vector tip
+            img = cached_image(song["image"], scale=0.4)  # Adjust scale as needed
+            img.move_to(vec.get_end() + np.array(song["image_offset"]))
+            return vec, img
+        
+        # Create arrows and images for the recommended songs
+        similar_vectors = VGroup()
+        similar_images = Group()  # Changed to Group since ImageMobject isn't a VMobject
+        for i in similar_ids:
+            vec, img = song_arrow_and_image(song_catalog[i], GREEN)
             similar_vectors.add(vec)
-            
-            # Load and position actual image with more precise positioning
-            img = ImageMobject(img_path).scale(0.4)  # Adjust scale as needed
-            
-            # Custom positioning for each image to align better with vector tips
-            if i == 0:  # First similar song (starboy)
-                img.move_to(vec.get_end() + np.array([0.6, 0.6, 0]))
-            else:  # Second similar song (tameimpala)
-                img.move_to(vec.get_end() + np.array([0.6, 0.2, 0]))
-                
             similar_images.add(img)
-            
-            # No check marks as requested
-            pass  # Skip adding check marks
         
-        # Create different song vectors with album art
+        # Create arrows and images for the remaining songs
         different_vectors = VGroup()
         different_images = Group()  # Changed to Group since ImageMobject isn't a VMobject
-        different_x_marks = VGroup()
-        
-        # Define points and image paths for different songs (only 1 Beethoven)
-        different_points = [(-2.5, -1.5)]  # Just 1 point for Beethoven
-        different_image_paths = [
-            "assets/beethoven.jpeg"  # Updated file extension to match actual file
-        ]
-        
-        # Create arrows and images for different songs
-        for i, (point, img_path) in enumerate(zip(different_points, different_image_paths)):
-            # Create vector arrow
-            vec = Arrow(
-                start=axes.coords_to_point(0, 0),
-                end=axes.coords_to_point(*point),
-                buff=0, 
-                color=RED,
-                stroke_width=5,
-                max_tip_length_to_length_ratio=0.2
-            )
+        for i in different_ids:
+            vec, img = song_arrow_and_image(song_catalog[i], RED)
             different_vectors.add(vec)
-
-            img = ImageMobject(img_path).scale(0.4)  # Adjust scale as needed
-            
-            # More precise positioning for Beethoven image
-            img.move_to(vec.get_end() + np.array([-0.7, -0.2, 0]))
             different_images.add(img)
                
         # Play animations for similar and different songs
@@ -621,3 +610,5 @@ class CosineSimilarityMusicRec(Scene):
 # manim -p -ql cosine_similarity.py CosineSimilarityTitle
 # manim -p -ql cosine_similarity.py CosineSimilarityIntuition
 # ... and so on for each scene.
+# Or render every scene of the video in parallel and join them:
+# python render_all.py -q l
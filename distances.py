@@ -0,0 +1,180 @@
+import numpy as np
+
+# Shared distance metrics used by the scenes.
+# Every function accepts a single vector or a 2-D array of row vectors for
+# either argument and returns a matching scalar, 1-D or 2-D result:
+#   (d,)   vs (d,)   -> scalar
+#   (d,)   vs (m, d) -> (m,)
+#   (n, d) vs (m, d) -> (n, m)
+# Work is done in row batches so memory stays bounded for thousands of points.
+
+# Upper bound on the number of floats held by one broadcast block
+BATCH_ELEMENTS = 2 ** 22
+
+
+def _as_rows(x):
+    arr = np.asarray(x, dtype=float)
+    if arr.ndim == 1:
+        return arr[np.newaxis, :], True
+    if arr.ndim != 2:
+        raise ValueError(f"expected a vector or a 2-D array of vectors, got shape {arr.shape}")
+    return arr, False
+
+
+def _shape_result(result, a_single, b_single):
+    if a_single and b_single:
+        return float(result[0, 0])
+    if a_single:
+        return result[0]
+    if b_single:
+        return result[:, 0]
+    return result
+
+
+def _batch_rows(n_cols, dim):
+    # Number of rows of `a` that can be broadcast against all of `b` at once
+    return max(1, BATCH_ELEMENTS // max(1, n_cols * dim))
+
+
+def _check_dims(a, b):
+    if a.shape[1] != b.shape[1]:
+        raise ValueError(f"dimension mismatch: {a.shape[1]} vs {b.shape[1]}")
+
+
+def squared_euclidean_distance(a, b):
+    a, a_single = _as_rows(a)
+    b, b_single = _as_rows(b)
+    _check_dims(a, b)
+
+    # ||a||^2 + ||b||^2 - 2 a.b, one matrix product per batch of rows
+    b_norms = np.einsum("ij,ij->i", b, b)
+    result = np.empty((a.shape[0], b.shape[0]))
+    step = _batch_rows(b.shape[0], 1)
+    for start in range(0, a.shape[0], step):
+        block = a[start:start + step]
+        out = result[start:start + step]
+        np.matmul(block, b.T, out=out)
+        out *= -2.0
+        out += np.einsum("ij,ij->i", block, block)[:, np.newaxis]
+        out += b_norms[np.newaxis, :]
+    # Cancellation can leave tiny negatives for coincident points
+    np.maximum(result, 0.0, out=result)
+    return _shape_result(result, a_single, b_single)
+
+
+def euclidean_distance(a, b):
+    return np.sqrt(squared_euclidean_distance(a, b))
+
+
+def minkowski_distance(a, b, p=2):
+    if p <= 0:
+        raise ValueError("p must be positive")
+    a, a_single = _as_rows(a)
+    b, b_single = _as_rows(b)
+    _check_dims(a, b)
+
+    result = np.empty((a.shape[0], b.shape[0]))
+    step = _batch_rows(b.shape[0], a.shape[1])
+    for start in range(0, a.shape[0], step):
+        diff = np.abs(a[start:start + step, np.newaxis, :] - b[np.newaxis, :, :])
+        if p == 1:
+            result[start:start + step] = diff.sum(axis=-1)
+        elif np.isinf(p):
+            result[start:start + step] = diff.max(axis=-1)
+        else:
+            result[start:start + step] = (diff ** p).sum(axis=-1) ** (1.0 / p)
+    return _shape_result(result, a_single, b_single)
+
+
+def manhattan_distance(a, b):
+    return minkowski_distance(a, b, p=1)
+
+
+def normalize_rows(x):
+    arr = np.asarray(x, dtype=float)
+    norms = np.linalg.norm(arr, axis=-1, keepdims=True)
+    # Leave zero vectors as zeros instead of producing NaNs
+    norms[norms == 0] = 1.0
+    return arr / norms
+
+
+def cosine_similarity(a, b):
+    a, a_single = _as_rows(a)
+    b, b_single = _as_rows(b)
+    _check_dims(a, b)
+    result = normalize_rows(a) @ normalize_rows(b).T
+    np.clip(result, -1.0, 1.0, out=result)
+    return _shape_result(result, a_single, b_single)
+
+
+def cosine_distance(a, b):
+    return 1.0 - cosine_similarity(a, b)
+
+
+METRICS = {
+    "euclidean": euclidean_distance,
+    "sqeuclidean": squared_euclidean_distance,
+    "manhattan": manhattan_distance,
+    "cosine": cosine_distance,
+}
+
+
+def pairwise_distances(a, b, metric="euclidean", p=None):
+    if metric == "minkowski":
+        return minkowski_distance(a, b, p=2 if p is None else p)
+    try:
+        func = METRICS[metric]
+    except KeyError:
+        raise ValueError(f"unknown metric {metric!r}; choose from {sorted(METRICS) + ['minkowski']}")
+    return func(a, b)
+
+
+def _row_norms(x, chunk_rows, dtype):
+    # Squared row norms of a possibly memory-mapped matrix, read in chunks
+    norms = np.empty(len(x), dtype=dtype)
+    for start in range(0, len(x), chunk_rows):
+        block = np.asarray(x[start:start + chunk_rows], dtype=dtype)
+        norms[start:start + chunk_rows] = np.einsum("ij,ij->i", block, block)
+    return norms
+
+
+def euclidean_distance_matrix_blocked(a, b, out_path, block_rows=4096, block_cols=4096,
+                                      dtype=np.float32, squared=False):
+    # Full (n x m) Euclidean distance matrix for inputs larger than RAM.
+    # a and b may be memory-mapped (e.g. FeatureStore.vectors); the result is
+    # written tile by tile into a .npy file opened as a memmap. Each tile uses
+    # ||a||^2 + ||b||^2 - 2 a.b with precomputed row norms and one BLAS matrix
+    # product, and small negatives left by cancellation are clamped to zero.
+    # Like scikit-learn, tiles are computed in float64 whatever the input and
+    # output dtypes: in float32 the cancellation error of close rows is as
+    # large as their distance. Only the stored result is cast to `dtype`.
+    if a.ndim != 2 or b.ndim != 2:
+        raise ValueError("a and b must be 2-D arrays of row vectors")
+    if a.shape[1] != b.shape[1]:
+        raise ValueError(f"dimension mismatch: {a.shape[1]} vs {b.shape[1]}")
+    compute_dtype = np.float64
+    # A row's distance to itself is exactly zero, which the expansion only
+    # gets to within rounding
+    same = a is b
+    a_norms = _row_norms(a, block_rows, compute_dtype)
+    b_norms = _row_norms(b, block_cols, compute_dtype)
+
+    out = np.lib.format.open_memmap(out_path, mode="w+", dtype=dtype, shape=(a.shape[0], b.shape[0]))
+    for i0 in range(0, a.shape[0], block_rows):
+        a_block = np.asarray(a[i0:i0 + block_rows], dtype=compute_dtype)
+        a_block_norms = a_norms[i0:i0 + block_rows, np.newaxis]
+        for j0 in range(0, b.shape[0], block_cols):
+            b_block = np.asarray(b[j0:j0 + block_cols], dtype=compute_dtype)
+            tile = a_block @ b_block.T
+            tile *= -2.0
+            tile += a_block_norms
+            tile += b_norms[np.newaxis, j0:j0 + block_cols]
+            np.maximum(tile, 0.0, out=tile)
+            if same:
+                diag = np.arange(max(i0, j0), min(i0 + len(a_block), j0 + len(b_block)))
+                tile[diag - i0, diag - j0] = 0.0
+            if not squared:
+                np.sqrt(tile, out=tile)
+            out[i0:i0 + block_rows, j0:j0 + block_cols] = tile
+    out.flush()
+    return out
@@ -2,17 +2,59 @@ from manim import *
 import numpy as np
 import random
 
+from checkpoints import SectionCheckpoints
+from distances import euclidean_distance
+from spatial_index import KDTree
+from text_cache import cached_text
+from timeseries import TimeSeriesLine
+
 class EuclideanDistanceVisualization(Scene):
+    # Sections in playing order, each with the mobjects it expects on screen
+    # when it starts. A section leaves the screen in the entry state of the
+    # next one, so sections rendered on their own join seamlessly.
+    SECTIONS = [
+        ("history", []),
+        ("properties", ["title"]),
+        ("how_it_works", ["title"]),
+        ("knn", ["title"]),
+        ("stock_trading", ["title"]),
+        ("strategy", ["title", "stock_section_title", "intro_text"]),
+        ("takeaways", ["title", "stock_section_title"]),
+    ]
+
+    # Scene attributes the sections share
+    SHARED_MOBJECTS = ["title", "stock_section_title", "intro_text"]
+
     def construct(self):
+        self.build_shared_mobjects()
+        # Resume after the last section whose code is unchanged since a
+        # previous render (see checkpoints.py)
+        names = [name for name, _ in self.SECTIONS]
+        checkpoints = SectionCheckpoints(self, names, self.SHARED_MOBJECTS)
+        for name in names[checkpoints.resume():]:
+            getattr(self, f"{name}_section")()
+            checkpoints.save(name)
+
+    def build_shared_mobjects(self):
         # Title that persists throughout the presentation
-        title = Text("Understanding Euclidean Distance", font_size=40)
-        title.to_edge(UP, buff=0.5)
-        self.play(Write(title))
+        self.title = Text("Understanding Euclidean Distance", font_size=40)
+        self.title.to_edge(UP, buff=0.5)
+
+        # Stock trading headings that stay on screen into the later sections
+        self.stock_section_title = Text("Real-World Example: Stock Trading", font_size=36, color=ORANGE)
+        self.stock_section_title.next_to(self.title, DOWN, buff=0.5)
+        self.intro_text = Text(
+            "Pairs Trading Strategy: Finding Correlated Stocks",
+            font_size=26
+        ).next_to(self.stock_section_title, DOWN, buff=0.5)
+
+    def history_section(self):
+        self.play(Write(self.title))
         self.wait(0.5)  # Reduced wait time
         
         # SECTION 1: HISTORY - More Visual Approach with proper spacing
         section_title = Text("Brief History", font_size=36, color=BLUE)
-        section_title.next_to(title, DOWN, buff=0.5)
+        section_title.next_to(self.title, DOWN, buff=0.5)
         self.play(FadeIn(section_title))
         
         # Ancient Greece visual - left side with proper spacing
@@ -69,9 +111,10 @@ class EuclideanDistanceVisualization(Scene):
             FadeOut(timeline, timeline_text, section_title)
         )
         
+    def properties_section(self):
         # SECTION 2: PROPERTIES OF EUCLIDEAN DISTANCE - Fixed positioning
         section_title = Text("Properties of Euclidean Distance", font_size=36, color=PURPLE)
-        section_title.next_to(title, DOWN, buff=0.5)
+        section_title.next_to(self.title, DOWN, buff=0.5)
         self.play(FadeIn(section_title))
         self.wait(0.5)  # Reduced wait time
         
@@ -244,9 +287,10 @@ class EuclideanDistanceVisualization(Scene):
         # Clear property section
         self.play(FadeOut(section_title))
         
+    def how_it_works_section(self):
         # SECTION: HOW IT WORKS - FIXED positioning with NO calculation formula overlap
         section_title = Text("How It Works", font_size=36, color=GREEN)
-        section_title.next_to(title, DOWN, buff=0.5)
+        section_title.next_to(self.title, DOWN, buff=0.5)
         self.play(FadeIn(section_title))
         
         # Formula display with proper sizing
@@ -331,7 +375,8 @@ class EuclideanDistanceVisualization(Scene):
         self.wait(0.5)  # Reduced wait time
         
         # Only showing the distance label next to point B
-        distance_label = MathTex(r"d \approx 4.24", font_size=28, color=YELLOW)
+        ab_distance = euclidean_distance([1, 1], [4, 4])
+        distance_label = MathTex(rf"d \approx {ab_distance:.2f}", font_size=28, color=YELLOW)
         distance_label.next_to(point_B, RIGHT, buff=0.5)  # Better positioning
         self.play(
             hypotenuse.animate.set_stroke(width=6, color=YELLOW),
@@ -346,9 +391,10 @@ class EuclideanDistanceVisualization(Scene):
             FadeOut(distance_label, formula, section_title)
         )
         
+    def knn_section(self):
                 # NEW SECTION: K-NEAREST NEIGHBORS - COMPLETELY REDESIGNED TO FIX OVERLAPS
         section_title = Text("K-Nearest Neighbors Algorithm", font_size=36, color=BLUE_D)
-        section_title.next_to(title, DOWN, buff=0.5)
+        section_title.next_to(self.title, DOWN, buff=0.5)
         self.play(FadeIn(section_title))
         self.wait(0.5)  # Short wait time
 
@@ -378,8 +424,8 @@ class EuclideanDistanceVisualization(Scene):
         knn_axes.center()    # This centers the axes in the screen
 
         # Clear axis labels
-        x_label = Text("Feature 1", font_size=20).next_to(knn_axes, DOWN, buff=0.15)
-        y_label = Text("Feature 2", font_size=20).next_to(knn_axes, LEFT, buff=0.15).rotate(PI/2)
+        x_label = cached_text("Feature 1", font_size=20).next_to(knn_axes, DOWN, buff=0.15)
+        y_label = cached_text("Feature 2", font_size=20).next_to(knn_axes, LEFT, buff=0.15).rotate(PI/2)
 
         self.play(Create(knn_axes))
         self.play(Write(x_label), Write(y_label))
@@ -389,26 +435,40 @@ class EuclideanDistanceVisualization(Scene):
         np.random.seed(42)
 
         # Generate class A points (blue cluster) in the bottom left
+        class_a_coords = []
         class_a_points = VGroup()
         for i in range(6):  # Fewer points to reduce clutter
             x = np.random.uniform(1.0, 2.5)  # Moved a bit left
             y = np.random.uniform(1.8, 3.0)  # Limited y-range to avoid overlaps
+            class_a_coords.append((x, y))
             point = Dot(knn_axes.coords_to_point(x, y), color=BLUE, radius=0.08)
             class_a_points.add(point)
 
         # Generate class B points (red cluster) in the top right
+        class_b_coords = []
         class_b_points = VGroup()
         for i in range(6):  # Fewer points to reduce clutter
             x = np.random.uniform(4.2, 5.8)  # Moved a bit right
             y = np.random.uniform(3.8, 5.0)  # Adjusted y-range
+            class_b_coords.append((x, y))
             point = Dot(knn_axes.coords_to_point(x, y), color=RED, radius=0.08)
             class_b_points.add(point)
 
+        # Index every labelled point so the neighbours and the vote come from real queries
+        knn_index = KDTree(
+            class_a_coords + class_b_coords,
+            labels=["A"] * len(class_a_coords) + ["B"] * len(class_b_coords)
+        )
+        all_knn_points = [*class_a_points, *class_b_points]
+        class_colors = {"A": BLUE, "B": RED}
+        class_color_names = {"A": "blue", "B": "red"}
+
         # Add all points at once for efficiency
         self.play(FadeIn(class_a_points), FadeIn(class_b_points))
 
         # Place the query point in a location that won't cause diagonal lines across text
-        query_point = Dot(knn_axes.coords_to_point(3.5, 3.5), color=GREEN, radius=0.12)
+        query_coords = (3.5, 3.5)
+        query_point = Dot(knn_axes.coords_to_point(*query_coords), color=GREEN, radius=0.12)
         query_label = Text("?", font_size=22, color=GREEN).next_to(query_point, UP, buff=0.15)  # Label above
 
         self.play(
@@ -418,17 +478,18 @@ class EuclideanDistanceVisualization(Scene):
         )
         self.wait(0.5)
 
-        # Use very specific positions for nearest neighbors to avoid text-crossing lines
-        nearest_1 = Dot(knn_axes.coords_to_point(2.8, 2.9), color=BLUE, radius=0.09)  # Blue point (bottom left)
-        nearest_2 = Dot(knn_axes.coords_to_point(3.8, 3.8), color=RED, radius=0.09)   # Red point (top right)
-        nearest_3 = Dot(knn_axes.coords_to_point(4.2, 3.5), color=RED, radius=0.09)   # Red point (right)
+        # Look up the 3 nearest neighbors and the majority vote from the index
+        k = 3
+        _, neighbour_ids = knn_index.query(query_coords, k=k)
+        predicted_class, votes = knn_index.classify(query_coords, k=k)
+        nearest_points = [all_knn_points[i] for i in neighbour_ids]
 
-        # Add these specific points to our scene
-        self.play(FadeIn(nearest_1), FadeIn(nearest_2), FadeIn(nearest_3))
+        # Emphasise the neighbours that were found
+        self.play(*[Indicate(point, color=YELLOW) for point in nearest_points])
 
         # Draw distance lines with good visibility - carefully positioned
         distance_lines = VGroup()
-        for point in [nearest_1, nearest_2, nearest_3]:
+        for point in nearest_points:
             line = DashedLine(
                 query_point.get_center(),
                 point.get_center(),
@@ -443,7 +504,7 @@ class EuclideanDistanceVisualization(Scene):
 
         # Highlight the 3 nearest neighbors
         nearest_circles = VGroup()
-        for point in [nearest_1, nearest_2, nearest_3]:
+        for point in nearest_points:
             circle = Circle(radius=0.2, color=YELLOW, stroke_width=2)
             circle.move_to(point.get_center())
             nearest_circles.add(circle)
@@ -451,29 +512,41 @@ class EuclideanDistanceVisualization(Scene):
         self.play(Create(nearest_circles))
         self.wait(0.5)
 
-        # Add class label for clarity
-        class_b_indicator = Text("B", font_size=18, color=RED)
-        class_b_indicator.move_to(nearest_2.get_center()).shift(UP * 0.25 + RIGHT * 0.25)
-        self.play(Write(class_b_indicator))
+        # Add class label for clarity next to the closest neighbour of the winning class
+        winning_neighbour = next(
+            point for point, i in zip(nearest_points, neighbour_ids)
+            if knn_index.labels[i] == predicted_class
+        )
+        class_indicator = Text(predicted_class, font_size=18, color=class_colors[predicted_class])
+        class_indicator.move_to(winning_neighbour.get_center()).shift(UP * 0.25 + RIGHT * 0.25)
+        self.play(Write(class_indicator))
         self.wait(0.2)
 
         # Add explanatory text near the bottom of screen but not directly under lines
-        k_text = Text("K=3: considering only 3 nearest neighbors", font_size=20, color=YELLOW)
+        k_text = Text(f"K={k}: considering only {k} nearest neighbors", font_size=20, color=YELLOW)
         k_text.to_edge(DOWN, buff=0.4)
         self.play(Write(k_text))
         self.wait(0.3)
 
         # Show the classification result
         self.play(FadeOut(x_label))
-        result_text = Text("Classification by majority: 2 red, 1 blue → Class B", font_size=22, color=YELLOW)
+        vote_summary = ", ".join(
+            f"{count} {class_color_names[label]}" for label, count in votes.most_common()
+        )
+        result_text = Text(
+            f"Classification by majority: {vote_summary} → Class {predicted_class}",
+            font_size=22,
+            color=YELLOW
+        )
         result_text.next_to(k_text, UP, buff=0.2)
         self.play(Write(result_text))
 
-        # Assign query point to Class B
+        # Assign query point to the predicted class
+        predicted_color = class_colors[predicted_class]
         self.play(
-            query_point.animate.set_color(RED),
+            query_point.animate.set_color(predicted_color),
             query_label.animate.become(
-                Text("B", font_size=22, color=RED).next_to(query_point, UP, buff=0.15)  # Keep label above
+                Text(predicted_class, font_size=22, color=predicted_color).next_to(query_point, UP, buff=0.15)  # Keep label above
             )
         )
         self.wait(0.5)
@@ -482,23 +555,18 @@ class EuclideanDistanceVisualization(Scene):
         self.play(
             FadeOut(knn_axes, x_label, y_label),
             FadeOut(class_a_points, class_b_points),
-            FadeOut(query_point, query_label, nearest_1, nearest_2, nearest_3, class_b_indicator),
+            FadeOut(query_point, query_label, class_indicator),
             FadeOut(distance_lines, nearest_circles, k_text, result_text)
         )
 
+    def stock_trading_section(self):
         # Show title again for the next section
-        section_title = Text("Real-World Example: Stock Trading", font_size=36, color=ORANGE)
-        section_title.next_to(title, DOWN, buff=0.5)
-        self.play(FadeIn(section_title))
+        self.play(FadeIn(self.stock_section_title))
         self.wait(0.5)  # Reduced wait time
         
         # PART 1: DATA COMPARISON WITH CLEAR POSITIONING
         # Introduction to pairs trading concept
-        intro_text = Text(
-            "Pairs Trading Strategy: Finding Correlated Stocks",
-            font_size=26
-        ).next_to(section_title, DOWN, buff=0.5)
-        self.play(Write(intro_text))
+        self.play(Write(self.intro_text))
         self.wait(0.7)  # Reduced wait time
         
         # Create stock table with improved spacing
@@ -517,7 +585,7 @@ class EuclideanDistanceVisualization(Scene):
         ).scale(0.6)
         
         # Position table to leave room for the graph
-        table.next_to(intro_text, DOWN, buff=0.5)
+        table.next_to(self.intro_text, DOWN, buff=0.5)
         self.play(Create(table))
         self.wait(1)  # Reduced wait time
         
@@ -525,8 +593,9 @@ class EuclideanDistanceVisualization(Scene):
         distance_title = Text("Calculating Euclidean Distance:", font_size=24)
         distance_title.next_to(table, DOWN, buff=0.7)
         
+        stock_distance = euclidean_distance(stock_A_returns, stock_B_returns)
         distance_formula = MathTex(
-            r"d = \sqrt{\sum_{i=1}^{5} (A_i - B_i)^2} \approx 0.79",
+            rf"d = \sqrt{{\sum_{{i=1}}^{{5}} (A_i - B_i)^2}} \approx {stock_distance:.2f}",
             font_size=28
         ).next_to(distance_title, DOWN, buff=0.3)
         
@@ -540,7 +609,7 @@ class EuclideanDistanceVisualization(Scene):
         # PART 2: STOCK RETURN VISUALIZATION - PROPERLY POSITIONED
         # Create stock return graph
         returns_title = Text("Visualizing Stock Returns", font_size=26)
-        returns_title.next_to(intro_text, DOWN, buff=0.5)
+        returns_title.next_to(self.intro_text, DOWN, buff=0.5)
         self.play(Write(returns_title))
         
         axes = Axes(
@@ -556,8 +625,8 @@ class EuclideanDistanceVisualization(Scene):
         axes.next_to(returns_title, DOWN, buff=0.5)
         
         # Clear axis labels
-        x_label = Text("Day", font_size=20).next_to(axes, DOWN, buff=0.2)
-        y_label = Text("Return %", font_size=20).next_to(axes, LEFT, buff=0.2).rotate(PI/2)
+        x_label = cached_text("Day", font_size=20).next_to(axes, DOWN, buff=0.2)
+        y_label = cached_text("Return %", font_size=20).next_to(axes, LEFT, buff=0.2).rotate(PI/2)
         
         self.play(Create(axes), Write(x_label), Write(y_label))
         self.wait(0.5)  # Reduced wait time
@@ -571,18 +640,14 @@ class EuclideanDistanceVisualization(Scene):
         stock_A_dots = VGroup(*[Dot(point, color=BLUE, radius=0.08) for point in stock_A_points])
         stock_B_dots = VGroup(*[Dot(point, color=RED, radius=0.08) for point in stock_B_points])
         
-        # Create lines connecting the dots
-        stock_A_line = VMobject()
-        stock_A_line.set_points_as_corners(stock_A_points)
-        stock_A_line.set_color(BLUE)
-        
-        stock_B_line = VMobject()
-        stock_B_line.set_points_as_corners(stock_B_points)
-        stock_B_line.set_color(RED)
+        # Create lines connecting the dots (downsampled to the plot's pixel
+        # width when fed real tick data)
+        stock_A_line = TimeSeriesLine(axes, np.array(days_positions), stock_A_returns, color=BLUE)
+        stock_B_line = TimeSeriesLine(axes, np.array(days_positions), stock_B_returns, color=RED)
         
         # Create labels for the lines - position to avoid overlap
-        stock_A_label = Text("Coca-Cola", font_size=20, color=BLUE).next_to(stock_A_points[-1], UR, buff=0.2)
-        stock_B_label = Text("Pepsi", font_size=20, color=RED).next_to(stock_B_points[-1], DR, buff=0.2)
+        stock_A_label = cached_text("Coca-Cola", font_size=20, color=BLUE).next_to(stock_A_points[-1], UR, buff=0.2)
+        stock_B_label = cached_text("Pepsi", font_size=20, color=RED).next_to(stock_B_points[-1], DR, buff=0.2)
         
         # Animate creation of graph elements
         self.play(Create(stock_A_line), Create(stock_B_line))
@@ -591,7 +656,7 @@ class EuclideanDistanceVisualization(Scene):
         self.wait(1)  # Reduced wait time
         
         # Euclidean distance result displayed below
-        distance_result = Text("Low Euclidean Distance (0.79) = High Correlation", font_size=24, color=YELLOW)
+        distance_result = Text(f"Low Euclidean Distance ({stock_distance:.2f}) = High Correlation", font_size=24, color=YELLOW)
         distance_result.to_edge(DOWN, buff=1.0)
         self.play(Write(distance_result))
         self.wait(1)  # Reduced wait time
@@ -603,9 +668,10 @@ class EuclideanDistanceVisualization(Scene):
             FadeOut(stock_A_label, stock_B_label, distance_result)
         )
         
+    def strategy_section(self):
         # PART 3: TRADING STRATEGY - CLEAR SEQUENTIAL STEPS
         strategy_title = Text("Trading Strategy Based on Correlation", font_size=28, color=GREEN)
-        strategy_title.next_to(intro_text, DOWN, buff=0.5)
+        strategy_title.next_to(self.intro_text, DOWN, buff=0.5)
         self.play(Write(strategy_title))
         self.wait(0.5)  # Reduced wait time
         
@@ -642,8 +708,8 @@ class EuclideanDistanceVisualization(Scene):
         correlation_viz = VGroup(stock1_line, stock2_line)
         correlation_viz.scale(0.7).next_to(step1_text, DOWN, buff=0.5)
         
-        corr_label1 = Text("Coca-Cola", font_size=18, color=BLUE).next_to(correlation_viz, UL, buff=0.2)
-        corr_label2 = Text("Pepsi", font_size=18, color=RED).next_to(correlation_viz, DL, buff=0.2)
+        corr_label1 = cached_text("Coca-Cola", font_size=18, color=BLUE).next_to(correlation_viz, UL, buff=0.2)
+        corr_label2 = cached_text("Pepsi", font_size=18, color=RED).next_to(correlation_viz, DL, buff=0.2)
         
         self.play(Create(stock1_line), Create(stock2_line))
         self.play(Write(corr_label1), Write(corr_label2))
@@ -791,15 +857,16 @@ class EuclideanDistanceVisualization(Scene):
         
         # Clear everything for conclusion
         self.play(
-            FadeOut(intro_text, strategy_title, step4_text),
+            FadeOut(self.intro_text, strategy_title, step4_text),
             FadeOut(profit_viz, p_start_marker, p_start_label),
             FadeOut(p_end_marker, p_end_label, profit_arrow, profit_label),
             FadeOut(key_insight)
         )
         
+    def takeaways_section(self):
         # CONCLUSION - FIXED WITH SIMPLE BULLET POINTS
         conclusion_title = Text("Key Takeaways", font_size=36, color=PURPLE)
-        conclusion_title.next_to(title, DOWN, buff=0.5)
+        conclusion_title.next_to(self.title, DOWN, buff=0.5)
         self.play(FadeIn(conclusion_title))
         self.wait(0.5)  # Reduced wait time
         
@@ -814,7 +881,7 @@ class EuclideanDistanceVisualization(Scene):
         
         bullet_points = VGroup()
         for i, point in enumerate(takeaways):
-            bullet = Text("•", font_size=28, color=YELLOW).shift(LEFT * 3.5 + DOWN * (i * 0.7 + 0.5))
+            bullet = cached_text("•", font_size=28, color=YELLOW).shift(LEFT * 3.5 + DOWN * (i * 0.7 + 0.5))
             text = Text(point, font_size=24).next_to(bullet, RIGHT, buff=0.3)
             bullet_points.add(VGroup(bullet, text))
         
@@ -835,7 +902,7 @@ class EuclideanDistanceVisualization(Scene):
         
         # Final fade out
         self.play(FadeOut(
-            title, conclusion_title, 
+            self.title, conclusion_title, 
             bullet_points,
             final_text
         ))
@@ -856,4 +923,44 @@ class EuclideanDistanceVisualization(Scene):
         self.play(Write(final_title))
         self.wait(0.5)  # Reduced wait time
         self.play(Write(next_up))
-        self.wait(1)  # Reduced wait time
\ No newline at end of file
+        self.wait(1)  # Reduced wait time
+
+
+class EuclideanSectionScene(EuclideanDistanceVisualization):
+    # Renders a single section of EuclideanDistanceVisualization, starting from
+    # its declared entry state, so sections can be rendered in parallel
+    section = None
+
+    def construct(self):
+        self.build_shared_mobjects()
+        entry_state = dict(self.SECTIONS)[self.section]
+        self.add(*[getattr(self, name) for name in entry_state])
+        getattr(self, f"{self.section}_section")()
+
+
+class EuclideanHistorySection(EuclideanSectionScene):
+    section = "history"
+
+
+class EuclideanPropertiesSection(EuclideanSectionScene):
+    section = "properties"
+
+
+class EuclideanHowItWorksSection(EuclideanSectionScene):
+    section = "how_it_works"
+
+
+class EuclideanKNNSection(EuclideanSectionScene):
+    section = "knn"
+
+
+class EuclideanStockTradingSection(EuclideanSectionScene):
+    section = "stock_trading"
+
+
+class EuclideanStrategySection(EuclideanSectionScene):
+    section = "strategy"
+
+
+class EuclideanTakeawaysSection(EuclideanSectionScene):
+    section = "takeaways"
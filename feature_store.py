@@ -0,0 +1,137 @@
+import json
+import os
+
+import numpy as np
+
+from distances import cosine_similarity, pairwise_distances
+
+# On-disk feature store for song and stock vectors.
+# A store is a directory holding
+#   vectors.bin  raw row-major matrix with a fixed dtype
+#   ids.npy      one id per row
+#   meta.json    dtype and shape
+# The matrix is opened with numpy.memmap, so only the rows that are being
+# read need to be in memory. nearest() scans the matrix in row chunks and is
+# the only search that stays out of core; the engines in retrieval.py and
+# spatial_index.py copy whatever they are given into memory.
+
+VECTORS_FILE = "vectors.bin"
+IDS_FILE = "ids.npy"
+META_FILE = "meta.json"
+
+DEFAULT_CHUNK_ROWS = 65536
+
+
+class FeatureStore:
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, META_FILE)) as f:
+            meta = json.load(f)
+        self.dtype = np.dtype(meta["dtype"])
+        self.shape = tuple(meta["shape"])
+        if self.shape[0]:
+            self.vectors = np.memmap(os.path.join(path, VECTORS_FILE), dtype=self.dtype, mode="r", shape=self.shape)
+        else:
+            self.vectors = np.empty(self.shape, dtype=self.dtype)
+        self.ids = np.load(os.path.join(path, IDS_FILE), allow_pickle=False)
+        self._row_of = None
+
+    @classmethod
+    def build(cls, path, chunks, dim, dtype="float32", normalize=False):
+        # Write a store from an iterable of (ids, vectors) chunks without ever
+        # holding more than one chunk of vectors in memory. With normalize=True
+        # rows are stored L2-normalised, ready for cosine scans.
+        os.makedirs(path, exist_ok=True)
+        dtype = np.dtype(dtype)
+        rows = 0
+        all_ids = []
+        with open(os.path.join(path, VECTORS_FILE), "wb") as out:
+            for ids, vectors in chunks:
+                vectors = np.atleast_2d(np.asarray(vectors, dtype=float))
+                if vectors.shape[1] != dim:
+                    raise ValueError(f"expected {dim}-dimensional vectors, got {vectors.shape[1]}")
+                if len(ids) != len(vectors):
+                    raise ValueError("each chunk needs one id per vector")
+                if normalize:
+                    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+                    norms[norms == 0] = 1.0
+                    vectors = vectors / norms
+                out.write(np.ascontiguousarray(vectors, dtype=dtype).tobytes())
+                all_ids.append(np.asarray(ids))
+                rows += len(vectors)
+
+        ids = np.concatenate(all_ids) if all_ids else np.empty(0, dtype=np.int64)
+        np.save(os.path.join(path, IDS_FILE), ids, allow_pickle=False)
+        with open(os.path.join(path, META_FILE), "w") as f:
+            json.dump({"dtype": dtype.str, "shape": [rows, dim], "normalized": normalize}, f)
+        return cls(path)
+
+    @classmethod
+    def from_array(cls, path, vectors, ids=None, chunk_rows=DEFAULT_CHUNK_ROWS, **kwargs):
+        vectors = np.asarray(vectors)
+        if ids is None:
+            ids = np.arange(len(vectors))
+        chunks = (
+            (ids[start:start + chunk_rows], vectors[start:start + chunk_rows])
+            for start in range(0, len(vectors), chunk_rows)
+        )
+        return cls.build(path, chunks, vectors.shape[1], **kwargs)
+
+    def __len__(self):
+        return self.shape[0]
+
+    @property
+    def dim(self):
+        return self.shape[1]
+
+    def rows_for(self, ids):
+        if self._row_of is None:
+            self._row_of = {key: row for row, key in enumerate(self.ids.tolist())}
+        return np.array([self._row_of[key] for key in np.asarray(ids).tolist()], dtype=np.intp)
+
+    def get(self, ids):
+        # Vectors for the given ids, read from disk into a regular array
+        return np.asarray(self.vectors[self.rows_for(ids)], dtype=float)
+
+    def iter_chunks(self, chunk_rows=DEFAULT_CHUNK_ROWS):
+        # Yields (start_row, block) with block a float array of at most chunk_rows rows
+        for start in range(0, len(self), chunk_rows):
+            yield start, np.asarray(self.vectors[start:start + chunk_rows], dtype=float)
+
+    def nearest(self, queries, k=10, metric="cosine", chunk_rows=DEFAULT_CHUNK_ROWS):
+        # Exact top-k search streamed over the store. Returns (ids, values):
+        # similarities for metric="cosine" (highest first), distances for the
+        # other metrics in distances.pairwise_distances (lowest first).
+        queries = np.asarray(queries, dtype=float)
+        single = queries.ndim == 1
+        queries = np.atleast_2d(queries)
+        k = min(int(k), len(self))
+        if k < 1:
+            raise ValueError("the store is empty")
+
+        best_cost = np.full((len(queries), 0), np.inf)
+        best_rows = np.empty((len(queries), 0), dtype=np.intp)
+        for start, block in self.iter_chunks(chunk_rows):
+            if metric == "cosine":
+                cost = -np.atleast_2d(cosine_similarity(queries, block))
+            else:
+                cost = np.atleast_2d(pairwise_distances(queries, block, metric=metric))
+            cost = np.concatenate([best_cost, cost], axis=1)
+            rows = np.concatenate(
+                [best_rows, np.broadcast_to(np.arange(start, start + len(block)), (len(queries), len(block)))],
+                axis=1,
+            )
+            if cost.shape[1] > k:
+                keep = np.argpartition(cost, k - 1, axis=1)[:, :k]
+                cost = np.take_along_axis(cost, keep, axis=1)
+                rows = np.take_along_axis(rows, keep, axis=1)
+            best_cost, best_rows = cost, rows
+
+        ranked = np.argsort(best_cost, axis=1, kind="stable")
+        best_cost = np.take_along_axis(best_cost, ranked, axis=1)
+        best_rows = np.take_along_axis(best_rows, ranked, axis=1)
+        values = -best_cost if metric == "cosine" else best_cost
+        ids = self.ids[best_rows]
+        if single:
+            return ids[0], values[0]
+        return ids, values
@@ -0,0 +1,154 @@
+import hashlib
+import json
+import os
+import subprocess
+from pathlib import Path
+
+# Re-timing of static holds at the concat stage.
+#
+# While rendering, StaticHoldRenderer notes every static hold (a self.wait
+# with nothing moving): where it starts in the scene's movie, how many frames
+# it lasts and the line of the scene source that called it. render_all stores
+# this next to the movie, with the movie's extension replaced: Scene.mp4 gets
+# Scene.holds.json.
+#
+# hold_timings.json overrides hold durations without touching the scene:
+#
+#   {
+#     "manhattan.py:96": 1,         every hold made by this line
+#     "manhattan.py:144#2": 8       only the 2nd hold made by this line
+#   }
+#
+# Keys are source lines, so they move when lines are added above them; keys
+# that match no hold are reported by render_all.
+#
+# The file is not part of the render cache key, so changing it re-runs only
+# the concat step: the scene movie is cut around the re-timed holds and every
+# re-timed hold becomes a still segment of the new length, made from a frame
+# of the original hold. The cuts are re-encoded, because stream-copy cuts of
+# an H.264 movie with B-frames don't land on exact frames. Segments are kept
+# in the work directory and reused while the movie is unchanged.
+
+HOLDS_SUFFIX = ".holds.json"
+
+
+def manifest_path(movie):
+    return Path(movie).with_suffix(HOLDS_SUFFIX)
+
+
+def write_manifest(movie, holds, fps, frames=None):
+    # frames: length of the movie in frames, if known
+    path = manifest_path(movie)
+    path.write_text(json.dumps({"fps": fps, "frames": frames, "holds": holds}, indent=2))
+    return path
+
+
+def load_timings(path):
+    path = Path(path)
+    if not path.exists():
+        return {}
+    return {key: float(seconds) for key, seconds in json.loads(path.read_text()).items()}
+
+
+# Encoder settings of manim's partial movies (libx264, yuv420p, crf 23, x264's
+# default preset and tune), so segments join by stream copy. Nothing may be
+# added for still segments only: options such as -tune stillimage change the
+# picture parameter set, and a stream-copy join keeps only the first one.
+H264 = ["-c:v", "libx264", "-pix_fmt", "yuv420p", "-crf", "23"]
+
+
+def encode_still(image, num_frames, fps, output):
+    # H.264 segment showing `image` for num_frames frames
+    subprocess.run(
+        ["ffmpeg", "-y", "-loglevel", "error",
+         "-loop", "1", "-framerate", str(fps), "-i", str(image),
+         "-frames:v", str(num_frames), *H264, "-r", str(fps), str(output)],
+        check=True,
+    )
+    return output
+
+
+def _cut(movie, first, last, fps, output):
+    # Frames first..last - 1 of `movie` (last None: to the end), re-encoded
+    end = "" if last is None else f":end_frame={last}"
+    subprocess.run(
+        ["ffmpeg", "-y", "-loglevel", "error", "-i", str(movie),
+         "-vf", f"trim=start_frame={first}{end},setpts=PTS-STARTPTS",
+         *H264, "-r", str(fps), str(output)],
+        check=True,
+    )
+    return output
+
+
+def _extract_frame(movie, frame, output):
+    subprocess.run(
+        ["ffmpeg", "-y", "-loglevel", "error", "-i", str(movie),
+         "-vf", f"select=eq(n\\,{frame})", "-frames:v", "1", str(output)],
+        check=True,
+    )
+    return output
+
+
+def _retimed_holds(holds, timings, matched):
+    # [(hold, new duration)] for the holds `timings` changes. Adds the keys
+    # used to `matched`.
+    seen = {}
+    changed = []
+    for hold in holds:
+        source = hold["source"]
+        seen[source] = seen.get(source, 0) + 1
+        for key in (f"{source}#{seen[source]}", source):
+            if key in timings:
+                matched.add(key)
+                changed.append((hold, timings[key]))
+                break
+    return changed
+
+
+def _movie_tag(movie):
+    # Changes whenever the movie is rendered again
+    stat = Path(movie).stat()
+    return hashlib.sha256(f"{Path(movie).resolve()}:{stat.st_size}:{stat.st_mtime_ns}".encode()).hexdigest()[:12]
+
+
+def retimed_segments(movie, timings, work_dir, matched=None):
+    # Movie files that, joined in order, play `movie` with its holds re-timed.
+    # Movies without a manifest or without re-timed holds are returned whole.
+    # The timing keys used are added to the `matched` set.
+    matched = set() if matched is None else matched
+    path = manifest_path(movie)
+    if not timings or not path.exists():
+        return [movie]
+    manifest = json.loads(path.read_text())
+    fps = manifest["fps"]
+    changed = _retimed_holds(manifest["holds"], timings, matched)
+    if not changed:
+        return [movie]
+
+    work_dir = Path(work_dir)
+    work_dir.mkdir(parents=True, exist_ok=True)
+    prefix = f"{Path(movie).stem}_{_movie_tag(movie)}"
+
+    def cached(name, make, *args):
+        # make(*args, output), unless an earlier run already made it
+        output = work_dir / name
+        if not output.exists():
+            tmp = output.with_name(f"tmp_{name}")
+            make(*args, tmp)
+            os.replace(tmp, output)
+        return output
+
+    segments = []
+    position = 0  # in frames of the original movie
+    for hold, seconds in changed:
+        start, frames = hold["start_frame"], hold["frames"]
+        if start > position:
+            segments.append(cached(f"{prefix}_{position}-{start}.mp4", _cut, movie, position, start, fps))
+        new_frames = max(1, round(seconds * fps))
+        still = cached(f"{prefix}_{start}.png", _extract_frame, movie, start + frames // 2)
+        segments.append(cached(f"{prefix}_{start}x{new_frames}.mp4", encode_still, still, new_frames, fps))
+        position = start + frames
+    total = manifest.get("frames")
+    if total is None or total > position:
+        segments.append(cached(f"{prefix}_{position}-end.mp4", _cut, movie, position, None, fps))
+    return segments
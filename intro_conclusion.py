@@ -1,6 +1,8 @@
 from manim import *
 import numpy as np
 
+from text_cache import cached_text
+
 class DistanceMetricsIntro(Scene):
     def construct(self):
         # Main title (2 seconds)
@@ -53,8 +55,8 @@ class DistanceMetricsIntro(Scene):
         )
         
         # Add point labels
-        label_a_euc = Text("A", font_size=20, color=RED).next_to(dot_a_euc, DOWN, buff=0.1)
-        label_b_euc = Text("B", font_size=20, color=GREEN).next_to(dot_b_euc, DOWN, buff=0.1)
+        label_a_euc = cached_text("A", font_size=20, color=RED).next_to(dot_a_euc, DOWN, buff=0.1)
+        label_b_euc = cached_text("B", font_size=20, color=GREEN).next_to(dot_b_euc, DOWN, buff=0.1)
         self.play(Write(label_a_euc), Write(label_b_euc), run_time=0.3)
         
         # Draw Euclidean line (0.7 seconds)
@@ -88,8 +90,8 @@ class DistanceMetricsIntro(Scene):
         )
         
         # Add point labels
-        label_a_man = Text("A", font_size=20, color=RED).next_to(dot_a_man, DOWN, buff=0.1)
-        label_b_man = Text("B", font_size=20, color=GREEN).next_to(dot_b_man, UP, buff=0.1)  # Changed to UP
+        label_a_man = cached_text("A", font_size=20, color=RED).next_to(dot_a_man, DOWN, buff=0.1)
+        label_b_man = cached_text("B", font_size=20, color=GREEN).next_to(dot_b_man, UP, buff=0.1)  # Changed to UP
         self.play(Write(label_a_man), Write(label_b_man), run_time=0.3)
         
         # Draw Manhattan path - horizontal then vertical (1.0 second)
@@ -133,8 +135,8 @@ class DistanceMetricsIntro(Scene):
         self.play(GrowArrow(arrow_a), GrowArrow(arrow_b), run_time=0.8)
         
         # Add vector labels
-        label_a_cos = Text("A", font_size=20, color=RED).next_to(arrow_a.get_end(), RIGHT, buff=0.1)
-        label_b_cos = Text("B", font_size=20, color=GREEN).next_to(arrow_b.get_end(), UP, buff=0.1)
+        label_a_cos = cached_text("A", font_size=20, color=RED).next_to(arrow_a.get_end(), RIGHT, buff=0.1)
+        label_b_cos = cached_text("B", font_size=20, color=GREEN).next_to(arrow_b.get_end(), UP, buff=0.1)
         self.play(Write(label_a_cos), Write(label_b_cos), run_time=0.3)
         
         # Draw angle arc and theta label (0.8 seconds)
@@ -179,4 +181,6 @@ class DistanceMetricsIntro(Scene):
     
 # To render using Manim CLI:
 # manim -p -ql intro_conclusion.py DistanceMetricsIntro
-# manim -p -ql intro_conclusion.py ConclusionScene
\ No newline at end of file
+# manim -p -ql intro_conclusion.py ConclusionScene
+# Or render every scene of the video in parallel and join them:
+# python render_all.py -q l
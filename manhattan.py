@@ -1,6 +1,14 @@
 from manim import *
 
+from clustering import assign_to_nearest
+from pathfinding import route_streets
+from point_cloud import PointCloud, PointCloudCamera
+from text_cache import cached_text
+
 class CombinedManhattanScene(Scene):
+    def __init__(self, camera_class=PointCloudCamera, **kwargs):
+        super().__init__(camera_class=camera_class, **kwargs)
+
     def construct(self):
         # === Scene 0 ===
         title = Text("Manhattan Distance", font_size=72)
@@ -104,8 +112,9 @@ class CombinedManhattanScene(Scene):
         delivery = grid.c2p(*delivery_coords)
         final_dropoff = grid.c2p(*final_dropoff_coords)
 
+        building_cells = [(3, 3), (3, 2), (4, 2), (4, 3), (0, 0), (0, 1), (1, 0), (1, 1)]
         buildings = VGroup()
-        for x, y in [(3, 3), (3, 2), (4, 2), (4, 3), (0, 0), (0, 1), (1, 0), (1, 1)]:
+        for x, y in building_cells:
             b = Rectangle(width=0.8, height=0.8, fill_color=GREY, fill_opacity=0.6, color=GREY).move_to(grid.c2p(x + 0.5, y + 0.5))
             buildings.add(b)
         self.play(FadeIn(buildings))
@@ -114,9 +123,9 @@ class CombinedManhattanScene(Scene):
         dot_start = Dot(start, color=BLUE).scale(1.2)
         dot_delivery = Dot(delivery, color=ORANGE).scale(1.2)
         dot_final = Dot(final_dropoff, color=RED).scale(1.2)
-        label_start = Text("Start", font_size=24).next_to(dot_start, DOWN)
-        label_delivery = Text("Delivery", font_size=24).next_to(dot_delivery, UP)
-        label_final = Text("Dropoff", font_size=24).next_to(dot_final, UP)
+        label_start = cached_text("Start", font_size=24).next_to(dot_start, DOWN)
+        label_delivery = cached_text("Delivery", font_size=24).next_to(dot_delivery, UP)
+        label_final = cached_text("Dropoff", font_size=24).next_to(dot_final, UP)
         self.play(FadeIn(dot_start), FadeIn(dot_delivery), FadeIn(dot_final))
         self.play(Write(label_start), Write(label_delivery), Write(label_final))
 
@@ -124,17 +133,15 @@ class CombinedManhattanScene(Scene):
         self.add(car)
         self.wait(10) #change this for voice over
 
-        p1 = Line(start, grid.c2p(2, 0), color=GREEN)
-        p2 = Line(grid.c2p(2, 0), delivery, color=GREEN)
-        self.play(Create(p1), car.animate.move_to(grid.c2p(2, 0)), run_time=2)
-        self.play(Create(p2), car.animate.move_to(delivery), run_time=2)
-        self.wait(5)
-
-        p3 = Line(delivery, grid.c2p(2, 4), color=GREEN)
-        p4 = Line(grid.c2p(2, 4), final_dropoff, color=GREEN)
-        self.play(Create(p3), car.animate.move_to(grid.c2p(2, 4)), run_time=2)
-        self.play(Create(p4), car.animate.move_to(final_dropoff), run_time=2)
-        self.wait(5)
+        # Shortest street route around the buildings: start -> delivery -> dropoff
+        legs = route_streets(building_cells, 6, 6, [start_coords, delivery_coords, final_dropoff_coords])
+        if legs is None:
+            raise ValueError("no street route between the stops; check building_cells")
+        for leg in legs:
+            for corner_from, corner_to in zip(leg, leg[1:]):
+                segment = Line(grid.c2p(*corner_from), grid.c2p(*corner_to), color=GREEN)
+                self.play(Create(segment), car.animate.move_to(grid.c2p(*corner_to)), run_time=2)
+            self.wait(5)
 
         self.clear()
         self.wait(3)
@@ -149,20 +156,23 @@ class CombinedManhattanScene(Scene):
         center_b = axes.c2p(5, 5)
         dot_a = Dot(center_a, color=BLUE).scale(1.2)
         dot_b = Dot(center_b, color=RED).scale(1.2)
-        label_a = Text("Cluster A", font_size=24, color=BLUE).next_to(dot_a, DOWN)
-        label_b = Text("Cluster B", font_size=24, color=RED).next_to(dot_b, UP)
+        label_a = cached_text("Cluster A", font_size=24, color=BLUE).next_to(dot_a, DOWN)
+        label_b = cached_text("Cluster B", font_size=24, color=RED).next_to(dot_b, UP)
         self.play(FadeIn(dot_a), FadeIn(dot_b), Write(label_a), Write(label_b), run_time=2)
 
         data_coords = [(2.5, 1.2), (3.2, 2.5), (4.5, 2.8), (2, 4), (4.1, 2.3)]
-        data_points = [Dot(axes.c2p(x, y), color=WHITE).scale(0.8) for x, y in data_coords]
-        self.play(*[FadeIn(p) for p in data_points], run_time=2)
+        # One array-backed mobject, so the same code handles thousands of points
+        data_points = PointCloud.from_axes(axes, data_coords, colors=WHITE, radii=0.8 * DEFAULT_DOT_RADIUS)
+        self.play(FadeIn(data_points), run_time=2)
+
+        # Nearest cluster centre by Manhattan distance for every point in one pass
+        # (a point equally far from both goes to Cluster B)
+        nearest_center, _ = assign_to_nearest(data_coords, [(1, 1), (5, 5)], metric="manhattan", ties="last")
 
         manhattan_lines = VGroup()
         assignments = []
-        for x, y in data_coords:
-            dist_a = abs(x - 1) + abs(y - 1)
-            dist_b = abs(x - 5) + abs(y - 5)
-            if dist_a < dist_b:
+        for (x, y), center_index in zip(data_coords, nearest_center):
+            if center_index == 0:
                 h = Line(axes.c2p(x, y), axes.c2p(1, y), color=BLUE)
                 v = Line(axes.c2p(1, y), center_a, color=BLUE)
                 manhattan_lines.add(h, v)
@@ -176,7 +186,7 @@ class CombinedManhattanScene(Scene):
         self.wait(5)
 
         euclidean_lines = VGroup()
-        for i, (point, assign) in enumerate(zip(data_points, assignments)):
+        for i, (point, assign) in enumerate(zip(data_points.points, assignments)):
             x, y = data_coords[i]
             if (x, y) == (2, 4):
                 target_center = center_a
@@ -184,14 +194,14 @@ class CombinedManhattanScene(Scene):
             else:
                 target_center = center_a if assign == 'A' else center_b
                 color = BLUE if assign == 'A' else RED
-            line = DashedLine(point.get_center(), target_center, color=color, stroke_width=2)
+            line = DashedLine(point, target_center, color=color, stroke_width=2)
             euclidean_lines.add(line)
 
         self.play(*[Create(line) for line in euclidean_lines], run_time=3)
         self.wait(4)
 
-        solid_key = VGroup(Line(ORIGIN, RIGHT * 0.5, color=WHITE), Text("Manhattan Distance", font_size=20).next_to(RIGHT * 0.5, RIGHT, buff=0.2))
-        dashed_key = VGroup(DashedLine(ORIGIN, RIGHT * 0.5, color=WHITE), Text("Euclidean Distance", font_size=20).next_to(RIGHT * 0.5, RIGHT, buff=0.2))
+        solid_key = VGroup(Line(ORIGIN, RIGHT * 0.5, color=WHITE), cached_text("Manhattan Distance", font_size=20).next_to(RIGHT * 0.5, RIGHT, buff=0.2))
+        dashed_key = VGroup(DashedLine(ORIGIN, RIGHT * 0.5, color=WHITE), cached_text("Euclidean Distance", font_size=20).next_to(RIGHT * 0.5, RIGHT, buff=0.2))
         legend = VGroup(solid_key, dashed_key).arrange(DOWN, aligned_edge=LEFT).to_corner(UR).shift(DOWN * 0.5 + LEFT * 0.5)
         self.play(FadeIn(legend), run_time=2)
         self.wait(3)
\ No newline at end of file
@@ -0,0 +1,203 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from distances import BATCH_ELEMENTS
+
+# Pairs-trading screens over a (tickers x days) matrix of returns.
+# For a window of returns the Euclidean distance between tickers i and j is
+#     d_ij^2 = S_i + S_j - 2 C_ij
+# with S_i the sum of squares of ticker i and C_ij the sum of cross products.
+# Keeping S and C as running sums means a new day only adds its own terms and
+# drops the terms of the day leaving the window, instead of recomputing the
+# whole window for every pair.
+
+
+def _top_pairs(sq_dist, tickers, n):
+    # The n closest distinct pairs from a symmetric matrix of squared distances
+    rows, cols = np.triu_indices(len(tickers), k=1)
+    values = sq_dist[rows, cols]
+    n = min(n, len(values))
+    if n == 0:
+        return []
+    best = np.argpartition(values, n - 1)[:n]
+    best = best[np.argsort(values[best], kind="stable")]
+    return [
+        (tickers[rows[i]], tickers[cols[i]], float(np.sqrt(max(values[i], 0.0))))
+        for i in best
+    ]
+
+
+class RollingPairScreener:
+    def __init__(self, tickers, window, refresh_every=10000):
+        self.tickers = list(tickers)
+        self.window = int(window)
+        if self.window < 1:
+            raise ValueError("window must be at least one day")
+        n = len(self.tickers)
+        self._days = np.zeros((self.window, n))
+        self._sum_sq = np.zeros(n)
+        self._cross = np.zeros((n, n))
+        self._count = 0
+        self._ticks = 0
+        # Rebuild the running sums from the window now and then so rounding
+        # error from many add/subtract updates cannot build up
+        self.refresh_every = refresh_every
+
+    @property
+    def ready(self):
+        return self._count >= self.window
+
+    def _rank_update(self, new, old):
+        # cross += outer(new, new) - outer(old, old), a block of rows at a time
+        step = max(1, BATCH_ELEMENTS // max(1, len(new)))
+        for start in range(0, len(new), step):
+            block = self._cross[start:start + step]
+            block += np.outer(new[start:start + step], new)
+            block -= np.outer(old[start:start + step], old)
+
+    def _refresh(self):
+        days = self._days if self.ready else self._days[:self._count]
+        self._sum_sq = np.einsum("ij,ij->j", days, days)
+        self._cross = days.T @ days
+
+    def update(self, returns):
+        # Push one day of returns, one value per ticker
+        new = np.asarray(returns, dtype=float)
+        if new.shape != (len(self.tickers),):
+            raise ValueError(f"expected {len(self.tickers)} returns, got shape {new.shape}")
+        slot = self._ticks % self.window
+        old = self._days[slot].copy() if self.ready else np.zeros_like(new)
+        self._days[slot] = new
+        self._count = min(self._count + 1, self.window)
+        self._ticks += 1
+
+        if self.refresh_every and self._ticks % self.refresh_every == 0:
+            self._refresh()
+            return
+        self._sum_sq += new * new - old * old
+        self._rank_update(new, old)
+
+    def extend(self, return_matrix):
+        # Push several days from a (tickers x days) matrix, oldest day first
+        for day in np.asarray(return_matrix, dtype=float).T:
+            self.update(day)
+
+    def squared_distances(self):
+        sq = self._sum_sq[:, np.newaxis] + self._sum_sq[np.newaxis, :] - 2.0 * self._cross
+        np.maximum(sq, 0.0, out=sq)
+        return sq
+
+    def distances(self):
+        # Euclidean distance between every pair over the current window
+        return np.sqrt(self.squared_distances())
+
+    def distance(self, ticker_a, ticker_b):
+        i, j = self.tickers.index(ticker_a), self.tickers.index(ticker_b)
+        sq = self._sum_sq[i] + self._sum_sq[j] - 2.0 * self._cross[i, j]
+        return float(np.sqrt(max(sq, 0.0)))
+
+    def top_pairs(self, n=10):
+        # The n most similar pairs as (ticker_a, ticker_b, distance), closest first
+        return _top_pairs(self.squared_distances(), self.tickers, n)
+
+
+# Batch screening: the (tickers x tickers) distance matrix is cut into tiles
+# above the diagonal and each tile is computed by a worker process. Workers
+# read the return matrix from a shared-memory buffer, so it is never pickled,
+# and only send back the best candidates of their tile.
+
+_shared = {}
+
+
+def _attach_returns(name, shape, dtype):
+    block = shared_memory.SharedMemory(name=name)
+    returns = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+    _shared["block"] = block
+    _shared["returns"] = returns
+    _shared["norms"] = np.einsum("ij,ij->i", returns, returns)
+
+
+def _screen_tile(rows, cols, top_k):
+    returns, norms = _shared["returns"], _shared["norms"]
+    a, b = returns[rows[0]:rows[1]], returns[cols[0]:cols[1]]
+    sq = norms[rows[0]:rows[1], np.newaxis] + norms[np.newaxis, cols[0]:cols[1]] - 2.0 * (a @ b.T)
+    np.maximum(sq, 0.0, out=sq)
+    if rows[0] == cols[0]:
+        # Diagonal tile: keep each pair once and skip self-pairs
+        sq[np.tril_indices(len(sq), m=sq.shape[1])] = np.inf
+    flat = sq.ravel()
+    k = min(top_k, len(flat))
+    best = np.argpartition(flat, k - 1)[:k]
+    best = best[np.isfinite(flat[best])]
+    i, j = np.divmod(best, sq.shape[1])
+    return flat[best], i + rows[0], j + cols[0]
+
+
+def _standardize(returns):
+    # Rows scaled to zero mean and unit length, so that for two rows
+    # d^2 = 2 (1 - correlation)
+    centered = returns - returns.mean(axis=1, keepdims=True)
+    norms = np.linalg.norm(centered, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return centered / norms
+
+
+def _fill_shared(block, source, dtype, standardize):
+    # Copy the returns into the shared buffer a block of rows at a time,
+    # converting on the way, so a memmapped input is never loaded whole
+    returns = np.ndarray(source.shape, dtype=dtype, buffer=block.buf)
+    step = max(1, BATCH_ELEMENTS // max(1, source.shape[1]))
+    for start in range(0, len(source), step):
+        rows = source[start:start + step].astype(dtype)
+        returns[start:start + step] = _standardize(rows) if standardize else rows
+
+
+def screen_pairs_parallel(return_matrix, tickers, top_k=100, metric="euclidean", tile_size=1024, workers=None):
+    # Global top-k most similar pairs over the full universe, closest first.
+    # metric="euclidean" returns (ticker_a, ticker_b, distance);
+    # metric="correlation" returns (ticker_a, ticker_b, correlation).
+    if metric not in ("euclidean", "correlation"):
+        raise ValueError("metric must be 'euclidean' or 'correlation'")
+    # No dtype here: a memmap stays on disk and is read block by block below
+    source = np.asarray(return_matrix)
+    if source.ndim != 2 or len(source) != len(tickers):
+        raise ValueError("return_matrix must be (tickers x days) with one row per ticker")
+    n = len(source)
+    bounds = [(start, min(start + tile_size, n)) for start in range(0, n, tile_size)]
+    tiles = [(rows, cols) for r, rows in enumerate(bounds) for cols in bounds[r:]]
+
+    shape, dtype = source.shape, np.dtype(np.float64)
+    block = shared_memory.SharedMemory(create=True, size=max(1, n * shape[1] * dtype.itemsize))
+    try:
+        _fill_shared(block, source, dtype, metric == "correlation")
+        best_values = np.empty(0)
+        best_i = np.empty(0, dtype=np.intp)
+        best_j = np.empty(0, dtype=np.intp)
+        with ProcessPoolExecutor(
+            max_workers=workers or os.cpu_count(),
+            initializer=_attach_returns,
+            initargs=(block.name, shape, dtype),
+        ) as pool:
+            futures = [pool.submit(_screen_tile, rows, cols, top_k) for rows, cols in tiles]
+            for future in as_completed(futures):
+                values, i, j = future.result()
+                best_values = np.concatenate([best_values, values])
+                best_i = np.concatenate([best_i, i])
+                best_j = np.concatenate([best_j, j])
+                if len(best_values) > top_k:
+                    keep = np.argpartition(best_values, top_k - 1)[:top_k]
+                    best_values, best_i, best_j = best_values[keep], best_i[keep], best_j[keep]
+    finally:
+        block.close()
+        block.unlink()
+
+    order = np.lexsort((best_j, best_i, best_values))
+    results = []
+    for idx in order:
+        sq = max(float(best_values[idx]), 0.0)
+        value = 1.0 - sq / 2.0 if metric == "correlation" else float(np.sqrt(sq))
+        results.append((tickers[best_i[idx]], tickers[best_j[idx]], value))
+    return results
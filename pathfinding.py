@@ -0,0 +1,161 @@
+import heapq
+
+import numpy as np
+
+# Grid pathfinding with A* and a Manhattan-distance heuristic.
+# Cells are addressed as (x, y) and moves are 4-connected with unit cost,
+# so the Manhattan distance to the goal never overestimates the remaining
+# cost and the returned paths are shortest paths.
+
+
+class OccupancyGrid:
+    def __init__(self, width, height, blocked=None):
+        if blocked is None:
+            blocked = np.zeros((width, height), dtype=bool)
+        blocked = np.asarray(blocked, dtype=bool)
+        if blocked.shape != (width, height):
+            raise ValueError(f"blocked must have shape {(width, height)}, got {blocked.shape}")
+        self.width = width
+        self.height = height
+        self.blocked = blocked.copy()
+        self._lookup = None
+
+    @classmethod
+    def from_array(cls, blocked):
+        blocked = np.asarray(blocked, dtype=bool)
+        return cls(blocked.shape[0], blocked.shape[1], blocked)
+
+    def block(self, cells):
+        cells = np.atleast_2d(np.asarray(cells, dtype=np.intp))
+        self.blocked[cells[:, 0], cells[:, 1]] = True
+        self._lookup = None
+
+    def block_rect(self, x0, y0, x1, y1):
+        # Block every cell with x0 <= x < x1 and y0 <= y < y1
+        self.blocked[x0:x1, y0:y1] = True
+        self._lookup = None
+
+    def in_bounds(self, cell):
+        x, y = cell
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def is_free(self, cell):
+        return self.in_bounds(cell) and not self.blocked[cell[0], cell[1]]
+
+    def _flat_lookup(self):
+        # Bytes indexed by flat cell id; indexing bytes is much cheaper than
+        # indexing a NumPy array one element at a time inside the search loop
+        if self._lookup is None:
+            self._lookup = np.ascontiguousarray(self.blocked, dtype=np.uint8).tobytes()
+        return self._lookup
+
+
+def find_path(grid, start, goal):
+    # Shortest 4-connected path from start to goal as a list of (x, y) cells,
+    # or None when the goal cannot be reached.
+    #
+    # The heuristic is consistent, so no cell is expanded twice, but every
+    # cell whose f is below the length of the path is expanded. The worst
+    # case is a long wall with a small gap far from the straight line: the
+    # search fills the whole side of the wall the start is on before it goes
+    # round. On a 2000 x 2000 grid split by a wall with a gap near the far
+    # end, that is 2M expanded cells and 6-9 s. An unreachable goal costs the
+    # same, since the whole component of the start is searched.
+    if not grid.is_free(start) or not grid.is_free(goal):
+        return None
+    height = grid.height
+    last_x = grid.width - 1
+    blocked = grid._flat_lookup()
+    start_id = start[0] * height + start[1]
+    goal_id = goal[0] * height + goal[1]
+    gx, gy = goal
+
+    best_cost = {start_id: 0}
+    came_from = {}
+    h0 = abs(start[0] - gx) + abs(start[1] - gy)
+    # Entries are (f, h, node): among equal f, expand the node nearest the goal
+    heap = [(h0, h0, start_id)]
+    while heap:
+        f, h, node = heapq.heappop(heap)
+        if node == goal_id:
+            break
+        # Skip stale entries left behind when a cheaper route was found
+        if f - h > best_cost[node]:
+            continue
+        x, y = divmod(node, height)
+        cost = best_cost[node] + 1
+        for nx, ny, neighbour in (
+            (x + 1, y, node + height),
+            (x - 1, y, node - height),
+            (x, y + 1, node + 1),
+            (x, y - 1, node - 1),
+        ):
+            if nx < 0 or nx > last_x or ny < 0 or ny >= height or blocked[neighbour]:
+                continue
+            if cost < best_cost.get(neighbour, cost + 1):
+                best_cost[neighbour] = cost
+                came_from[neighbour] = node
+                h = abs(nx - gx) + abs(ny - gy)
+                heapq.heappush(heap, (cost + h, h, neighbour))
+    else:
+        return None
+
+    path = [goal_id]
+    while path[-1] != start_id:
+        path.append(came_from[path[-1]])
+    path.reverse()
+    return [divmod(node, height) for node in path]
+
+
+def route(grid, stops):
+    # Multi-stop route visiting the stops in order. Returns one path per leg,
+    # or None if any leg is unreachable.
+    legs = []
+    for leg_start, leg_end in zip(stops, stops[1:]):
+        path = find_path(grid, tuple(leg_start), tuple(leg_end))
+        if path is None:
+            return None
+        legs.append(path)
+    return legs
+
+
+def path_corners(path):
+    # Keep only the endpoints and the cells where the path changes direction
+    if len(path) < 3:
+        return list(path)
+    points = np.asarray(path)
+    steps = np.diff(points, axis=0)
+    turns = np.any(steps[1:] != steps[:-1], axis=1)
+    keep = np.concatenate([[True], turns, [True]])
+    return [tuple(p) for p in points[keep].tolist()]
+
+
+def street_grid(building_cells, width, height):
+    # Occupancy grid for a street network that runs along the edges of a
+    # width x height block of cells. The grid has half-cell resolution: node
+    # (2x, 2y) is the street corner at (x, y). Cell interiors are never
+    # walkable, a street segment is closed when buildings sit on both of its
+    # sides, and a corner is closed when all four surrounding cells are
+    # buildings.
+    buildings = np.zeros((width, height), dtype=bool)
+    cells = np.atleast_2d(np.asarray(building_cells, dtype=np.intp))
+    if cells.size:
+        buildings[cells[:, 0], cells[:, 1]] = True
+    padded = np.pad(buildings, 1)
+
+    blocked = np.zeros((2 * width + 1, 2 * height + 1), dtype=bool)
+    blocked[1::2, 1::2] = True
+    blocked[0::2, 1::2] = padded[:-1, 1:-1] & padded[1:, 1:-1]
+    blocked[1::2, 0::2] = padded[1:-1, :-1] & padded[1:-1, 1:]
+    blocked[0::2, 0::2] = padded[:-1, :-1] & padded[1:, :-1] & padded[:-1, 1:] & padded[1:, 1:]
+    return OccupancyGrid.from_array(blocked)
+
+
+def route_streets(building_cells, width, height, stops):
+    # Route between street corners around the given buildings. Returns each
+    # leg as its corner points in cell units, or None if a stop is unreachable.
+    grid = street_grid(building_cells, width, height)
+    legs = route(grid, [(2 * x, 2 * y) for x, y in stops])
+    if legs is None:
+        return None
+    return [[(x // 2, y // 2) for x, y in path_corners(leg)] for leg in legs]
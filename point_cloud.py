@@ -0,0 +1,159 @@
+import numpy as np
+from manim import DEFAULT_DOT_RADIUS, WHITE, Camera, PMobject, color_to_rgba
+from manim.utils.bezier import interpolate
+
+# Scatter plots of many points as one mobject.
+#
+# A VGroup of Dot objects costs a full VMobject (Bezier outline, style arrays,
+# Cairo path) per point. PointCloud keeps positions (n, 3), colours (n, 4) and
+# radii (n,) in contiguous arrays, so moving, fading or recolouring all points
+# is one array operation and animates through the usual Transform
+# interpolation:
+#
+#   cloud = PointCloud.from_axes(axes, coords, colors=WHITE)
+#   self.play(FadeIn(cloud))
+#   self.play(cloud.animate.color_by_labels(labels, [BLUE, RED]))
+#
+# PointCloudCamera draws a PointCloud as anti-aliased discs straight into the
+# pixel array, in batches. The stock camera still shows it, but as squares of
+# the stroke width, like any PMobject.
+
+# Upper bound on the number of pixel samples handled by one drawing batch
+BATCH_ELEMENTS = 2 ** 22
+
+
+def _rgbas(colors, n, opacity=None):
+    if isinstance(colors, np.ndarray) and colors.dtype.kind == "f":
+        rgbas = np.ones((n, 4))
+        rgbas[:, :colors.shape[1]] = colors
+    elif isinstance(colors, (list, tuple)) and len(colors) == n and n and not isinstance(colors[0], float):
+        rgbas = np.array([color_to_rgba(color) for color in colors])
+    else:
+        rgbas = np.tile(color_to_rgba(colors), (n, 1))
+    if opacity is not None:
+        rgbas[:, 3] = opacity
+    return rgbas
+
+
+class PointCloud(PMobject):
+    def __init__(self, positions, colors=WHITE, radii=DEFAULT_DOT_RADIUS, opacity=1.0, **kwargs):
+        super().__init__(**kwargs)
+        positions = np.asarray(positions, dtype=float)
+        points = np.zeros((len(positions), 3))
+        points[:, :positions.shape[1]] = positions
+        self.points = points
+        self.set_colors(colors, opacity)
+        self.set_radii(radii)
+
+    @classmethod
+    def from_axes(cls, axes, coords, **kwargs):
+        # Points at the given (x, y) coordinates of linear axes
+        coords = np.asarray(coords, dtype=float)
+        origin = axes.c2p(0, 0)
+        x_step = axes.c2p(1, 0) - origin
+        y_step = axes.c2p(0, 1) - origin
+        return cls(origin + coords[:, :1] * x_step + coords[:, 1:2] * y_step, **kwargs)
+
+    def reset_points(self):
+        super().reset_points()
+        self.radii = np.zeros(0)
+        return self
+
+    def get_array_attrs(self):
+        # Aligned, copied and resized together with the points
+        return super().get_array_attrs() + ["radii"]
+
+    def set_positions(self, positions):
+        positions = np.asarray(positions, dtype=float)
+        if len(positions) != len(self.points):
+            raise ValueError(f"expected {len(self.points)} positions, got {len(positions)}")
+        self.points[:, :positions.shape[1]] = positions
+        return self
+
+    def set_colors(self, colors, opacity=None):
+        # One colour for every point, one colour per point, or an (n, 3|4) array
+        self.rgbas = _rgbas(colors, len(self.points), opacity)
+        return self
+
+    def color_by_labels(self, labels, palette):
+        # Colour point i with palette[labels[i]]; palette is a list or a dict
+        labels = np.asarray(labels)
+        if isinstance(palette, dict):
+            keys = list(palette)
+            table = np.array([color_to_rgba(palette[key]) for key in keys])
+            labels = np.array([keys.index(label) for label in labels.tolist()])
+        else:
+            table = np.array([color_to_rgba(color) for color in palette])
+        rgbas = table[labels]
+        rgbas[:, 3] = self.rgbas[:, 3]
+        self.rgbas = rgbas
+        return self
+
+    def set_radii(self, radii):
+        self.radii = np.broadcast_to(np.asarray(radii, dtype=float), (len(self.points),)).copy()
+        return self
+
+    def set_opacity(self, opacity, family=True):
+        self.rgbas[:, 3] = opacity
+        return self
+
+    def fade(self, darkness=0.5, family=True):
+        self.rgbas[:, 3] *= 1 - darkness
+        return self
+
+    def scale(self, scale_factor, **kwargs):
+        super().scale(scale_factor, **kwargs)
+        self.radii *= abs(scale_factor)
+        return self
+
+    def interpolate_color(self, mobject1, mobject2, alpha):
+        super().interpolate_color(mobject1, mobject2, alpha)
+        self.radii = interpolate(mobject1.radii, mobject2.radii, alpha)
+        return self
+
+
+class PointCloudCamera(Camera):
+    def display_point_cloud(self, pmobject, points, rgbas, thickness, pixel_array):
+        if not isinstance(pmobject, PointCloud) or len(points) == 0:
+            return super().display_point_cloud(pmobject, points, rgbas, thickness, pixel_array)
+
+        # Pixel coordinates of the centres, and radii in pixels
+        x_scale = self.pixel_width / self.frame_width
+        y_scale = self.pixel_height / self.frame_height
+        centers = np.empty((len(points), 2))
+        centers[:, 0] = (points[:, 0] - self.frame_center[0]) * x_scale + self.pixel_width / 2
+        centers[:, 1] = (self.frame_center[1] - points[:, 1]) * y_scale + self.pixel_height / 2
+        radii = pmobject.radii * x_scale
+
+        # Points with the same kernel size are drawn together
+        half_sizes = np.ceil(radii + 1).astype(int)
+        for half in np.unique(half_sizes):
+            selected = np.flatnonzero(half_sizes == half)
+            offsets = np.arange(-half, half + 1)
+            dx, dy = [grid.ravel() for grid in np.meshgrid(offsets, offsets)]
+            step = max(1, BATCH_ELEMENTS // len(dx))
+            for start in range(0, len(selected), step):
+                batch = selected[start:start + step]
+                self._draw_discs(centers[batch], radii[batch], rgbas[batch], dx, dy, pixel_array)
+        return pixel_array
+
+    def _draw_discs(self, centers, radii, rgbas, dx, dy, pixel_array):
+        px = np.floor(centers[:, :1]).astype(int) + dx
+        py = np.floor(centers[:, 1:]).astype(int) + dy
+        # Coverage of each pixel by the disc, with a one pixel soft edge
+        distance = np.hypot(px + 0.5 - centers[:, :1], py + 0.5 - centers[:, 1:])
+        alpha = np.clip(radii[:, np.newaxis] - distance + 0.5, 0.0, 1.0) * rgbas[:, 3:4]
+        inside = (alpha > 0) & (px >= 0) & (px < self.pixel_width) & (py >= 0) & (py < self.pixel_height)
+        if not inside.any():
+            return
+        rows, cols = py[inside], px[inside]
+        alpha = alpha[inside][:, np.newaxis]
+        colors = np.broadcast_to(rgbas[:, np.newaxis, :3], (*inside.shape, 3))[inside] * self.rgb_max_val
+
+        # "Over" blend with the current pixels; where discs overlap inside one
+        # batch the later disc wins
+        background = pixel_array[rows, cols].astype(float)
+        blended = np.empty_like(background)
+        blended[:, :3] = alpha * colors + (1 - alpha) * background[:, :3]
+        blended[:, 3:] = alpha * self.rgb_max_val + (1 - alpha) * background[:, 3:]
+        pixel_array[rows, cols] = blended.astype(pixel_array.dtype)
@@ -0,0 +1,303 @@
+import argparse
+import importlib
+import inspect
+import os
+import subprocess
+import sys
+import tempfile
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+from chunked_render import (
+    CHUNKED_SCENES, merge_hold_manifests, plan_chunks, play_frames, render_chunk, scene_seed,
+)
+from hold_timing import HOLDS_SUFFIX, load_timings, retimed_segments, write_manifest
+from render_cache import DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES, RenderCache, scene_cache_key
+from tex_batch import precompile_tex, worker_tex_dir
+
+# Renders every scene of the video in parallel and joins them into one file.
+#
+#   python render_all.py                 # low quality, one worker per core
+#   python render_all.py -q h -o final.mp4
+#   python render_all.py --list          # show the scenes that were found
+#
+# Scenes are rendered by worker processes, then concatenated in RENDER_ORDER
+# with ffmpeg. All scenes share the same quality settings, so the segments
+# are stream-copied without re-encoding. Finished movies go into the render
+# cache (see render_cache.py); scenes whose source, assets and settings are
+# unchanged are taken from it instead of being rendered again. Point
+# --cache-dir (or RENDER_CACHE_DIR) at a shared directory to reuse renders
+# across machines.
+#
+# Long scenes in CHUNKED_SCENES are split into --chunks parts of their
+# timeline that render in parallel too (see chunked_render.py).
+#
+# Hold lengths can be changed in hold_timings.json without re-rendering
+# anything; see hold_timing.py.
+
+ROOT = Path(__file__).resolve().parent
+
+SCENE_MODULES = ["intro_conclusion", "euclidean_distance", "manhattan", "cosine_similarity"]
+
+# Order of the scenes in the final video. Scenes that exist but are not listed
+# here (e.g. CosineSimilarityInterpretation, or EuclideanDistanceVisualization
+# in one piece) are skipped unless --all is given.
+RENDER_ORDER = [
+    "intro_conclusion.DistanceMetricsIntro",
+    # EuclideanDistanceVisualization is rendered as its sections so they run in parallel
+    "euclidean_distance.EuclideanHistorySection",
+    "euclidean_distance.EuclideanPropertiesSection",
+    "euclidean_distance.EuclideanHowItWorksSection",
+    "euclidean_distance.EuclideanKNNSection",
+    "euclidean_distance.EuclideanStockTradingSection",
+    "euclidean_distance.EuclideanStrategySection",
+    "euclidean_distance.EuclideanTakeawaysSection",
+    "manhattan.CombinedManhattanScene",
+    "cosine_similarity.CosineSimilarityTitle",
+    "cosine_similarity.CosineSimilarityIntuition",
+    "cosine_similarity.CosineSimilarityFormula",
+    "cosine_similarity.CosineSimilarityExample",
+    "cosine_similarity.CosineSimilarityMusicRec",
+]
+
+QUALITIES = {
+    "l": "low_quality",
+    "m": "medium_quality",
+    "h": "high_quality",
+    "p": "production_quality",
+    "k": "fourk_quality",
+}
+
+
+def _prepare_process():
+    # Scenes load assets by relative path and import the helper modules
+    os.chdir(ROOT)
+    if str(ROOT) not in sys.path:
+        sys.path.insert(0, str(ROOT))
+
+
+def discover_scenes(modules=SCENE_MODULES):
+    # Every Scene subclass defined in the given modules, keyed "module.Class"
+    _prepare_process()
+    from manim import Scene
+
+    found = {}
+    for module_name in modules:
+        module = importlib.import_module(module_name)
+        for name, obj in inspect.getmembers(module, inspect.isclass):
+            if not issubclass(obj, Scene) or obj is Scene or obj.__module__ != module.__name__:
+                continue
+            # Section base classes have no section of their own to render
+            if "section" in vars(obj) and obj.section is None:
+                continue
+            found[f"{module_name}.{name}"] = obj
+    return found
+
+
+def render_scene(scene_id, quality, media_dir):
+    # Runs in a worker process. Returns (scene_id, path of the rendered movie).
+    _prepare_process()
+    from manim import tempconfig
+
+    from static_holds import StaticHoldRenderer
+
+    module_name, class_name = scene_id.rsplit(".", 1)
+    scene_cls = getattr(importlib.import_module(module_name), class_name)
+    with worker_tex_dir(media_dir) as tex_dir, tempconfig({
+        "quality": quality,
+        "media_dir": str(media_dir),
+        "tex_dir": str(tex_dir),
+        "progress_bar": "none",
+        "verbosity": "WARNING",
+    }):
+        # Waits with nothing moving are encoded from a single still frame
+        scene = scene_cls(renderer=StaticHoldRenderer(), random_seed=scene_seed(scene_id))
+        scene.render()
+        renderer = scene.renderer
+        movie = renderer.file_writer.movie_file_path
+        fps = renderer.camera.frame_rate
+        write_manifest(movie, renderer.holds, fps, frames=round(renderer.time * fps))
+        return scene_id, str(movie)
+
+
+def concat_videos(paths, output):
+    output = Path(output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as f:
+        for path in paths:
+            escaped = str(Path(path).resolve()).replace("'", r"'\''")
+            f.write(f"file '{escaped}'\n")
+        list_file = f.name
+    try:
+        subprocess.run(
+            ["ffmpeg", "-y", "-loglevel", "error", "-f", "concat", "-safe", "0",
+             "-i", list_file, "-c", "copy", str(output)],
+            check=True,
+        )
+    finally:
+        os.remove(list_file)
+    return output
+
+
+def _stitch_chunks(scene_id, chunk_movies):
+    class_name = scene_id.rsplit(".", 1)[1]
+    movie = Path(chunk_movies[0]).with_name(f"{class_name}{Path(chunk_movies[0]).suffix}")
+    concat_videos(chunk_movies, movie)
+    merge_hold_manifests(chunk_movies, movie)
+    return str(movie)
+
+
+def scene_order(found, order=RENDER_ORDER, include_unlisted=False):
+    missing = [scene_id for scene_id in order if scene_id not in found]
+    if missing:
+        raise ValueError(f"scenes in the render order were not found: {', '.join(missing)}")
+    ordered = list(order)
+    if include_unlisted:
+        ordered += [scene_id for scene_id in found if scene_id not in order]
+    return ordered
+
+
+def render_all(order=RENDER_ORDER, quality="low_quality", workers=None,
+               media_dir=ROOT / "media", output=None, include_unlisted=False,
+               cache_dir=DEFAULT_CACHE_DIR, cache_max_bytes=DEFAULT_MAX_BYTES, use_cache=True,
+               hold_timings=ROOT / "hold_timings.json", chunks=4):
+    found = discover_scenes()
+    ordered = scene_order(found, order, include_unlisted)
+    skipped = [scene_id for scene_id in found if scene_id not in ordered]
+    if skipped:
+        print(f"Skipping scenes not in the render order: {', '.join(skipped)}")
+
+    # The renderer render_scene and render_chunk use, part of every cache key
+    from static_holds import StaticHoldRenderer
+
+    cache = RenderCache(cache_dir, cache_max_bytes, sidecar_suffixes=[HOLDS_SUFFIX]) if use_cache else None
+    movies = {}
+    keys = {}
+    for scene_id in ordered:
+        if cache is None:
+            continue
+        settings = {"quality": quality, "random_seed": scene_seed(scene_id)}
+        keys[scene_id] = scene_cache_key(found[scene_id], settings, renderer_cls=StaticHoldRenderer)
+        cached = cache.get(keys[scene_id])
+        if cached is not None:
+            movies[scene_id] = str(cached)
+    pending = [scene_id for scene_id in ordered if scene_id not in movies]
+    if cache is not None:
+        print(f"{len(movies)} of {len(ordered)} scenes found in the render cache")
+
+    if pending:
+        # Compile the LaTeX of all pending scenes up front, in parallel, so the
+        # render workers find the SVGs in manim's cache
+        from manim import tempconfig
+
+        with tempconfig({"media_dir": str(media_dir)}):
+            modules = sorted({scene_id.split(".")[0] for scene_id in pending})
+            compiled = precompile_tex([ROOT / f"{module}.py" for module in modules], workers)
+        print(f"Pre-compiled {compiled} LaTeX snippets")
+
+        workers = workers or os.cpu_count() or 1
+        chunked = [scene_id for scene_id in pending if scene_id in CHUNKED_SCENES and chunks > 1]
+        print(f"Rendering {len(pending)} scenes with {workers} workers")
+        # Tasks are handed to the pool only when a worker is free, so the dry
+        # runs that plan the chunks, and then the chunks of the long scenes,
+        # go ahead of the other scenes instead of queueing behind them
+        queue = deque((play_frames, scene_id, quality, media_dir) for scene_id in chunked)
+        queue.extend((render_scene, scene_id, quality, media_dir) for scene_id in pending if scene_id not in chunked)
+        chunk_movies = {}
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            running = {}
+            while queue or running:
+                while queue and len(running) < workers:
+                    task = queue.popleft()
+                    running[pool.submit(*task)] = task
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    func, scene_id = running.pop(future)[:2]
+                    result = future.result()
+                    if func is play_frames:
+                        ranges = plan_chunks(result, chunks)
+                        chunk_movies[scene_id] = [None] * len(ranges)
+                        queue.extendleft(reversed([
+                            (render_chunk, scene_id, quality, media_dir, index, first, last)
+                            for index, (first, last) in enumerate(ranges)
+                        ]))
+                        continue
+                    if func is render_chunk:
+                        _, index, chunk = result
+                        chunk_movies[scene_id][index] = chunk
+                        if None in chunk_movies[scene_id]:
+                            continue
+                        movie = _stitch_chunks(scene_id, chunk_movies[scene_id])
+                    else:
+                        movie = result[1]
+                    movies[scene_id] = movie
+                    if cache is not None:
+                        cache.put(keys[scene_id], movie)
+                    print(f"  done: {scene_id}")
+
+    if output is None:
+        output = Path(media_dir) / "videos" / f"distance_metrics_{quality}.mp4"
+    timings = load_timings(hold_timings)
+    matched = set()
+    segments = [
+        segment
+        for scene_id in ordered
+        for segment in retimed_segments(movies[scene_id], timings, Path(media_dir) / "holds", matched)
+    ]
+    unmatched = sorted(set(timings) - matched)
+    if unmatched:
+        # Keys are source lines, which move when the scene code above them changes
+        print(f"warning: hold timings that match no hold were ignored: {', '.join(unmatched)}")
+    concat_videos(segments, output)
+    print(f"Wrote {output}")
+    return output
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render every scene in parallel and join them into one video.")
+    parser.add_argument("-q", "--quality", choices=sorted(QUALITIES), default="l",
+                        help="manim quality flag (l, m, h, p, k)")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="number of render processes (default: number of cores)")
+    parser.add_argument("-o", "--output", default=None, help="path of the final video")
+    parser.add_argument("--media-dir", default=str(ROOT / "media"))
+    parser.add_argument("--scenes", nargs="+", default=None,
+                        help="render only these scenes, in this order (module.Class)")
+    parser.add_argument("--all", action="store_true",
+                        help="also render scenes that are not in the default order")
+    parser.add_argument("--list", action="store_true", help="list the scenes found and exit")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR,
+                        help="render cache directory, may be shared between machines")
+    parser.add_argument("--cache-size", type=float, default=DEFAULT_MAX_BYTES / 1024 ** 3,
+                        help="render cache size limit in GB")
+    parser.add_argument("--no-cache", action="store_true", help="render every scene from scratch")
+    parser.add_argument("--chunks", type=int, default=4,
+                        help="split each long single-timeline scene into this many parallel chunks (1: off)")
+    parser.add_argument("--hold-timings", default=str(ROOT / "hold_timings.json"),
+                        help="JSON file of hold durations overriding the scenes' waits")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for scene_id in discover_scenes():
+            marker = "*" if scene_id in RENDER_ORDER else " "
+            print(f"{marker} {scene_id}")
+        return
+
+    render_all(
+        order=args.scenes or RENDER_ORDER,
+        quality=QUALITIES[args.quality],
+        workers=args.workers,
+        media_dir=Path(args.media_dir),
+        output=args.output,
+        include_unlisted=args.all,
+        cache_dir=args.cache_dir,
+        cache_max_bytes=int(args.cache_size * 1024 ** 3),
+        use_cache=not args.no_cache,
+        hold_timings=args.hold_timings,
+        chunks=args.chunks,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+import ast
+import hashlib
+import inspect
+import os
+import shutil
+import sys
+import tempfile
+import textwrap
+from pathlib import Path
+
+# Content-addressed cache of rendered scene movies.
+#
+# The key of a scene hashes everything its pixels depend on:
+#   - the normalised source (AST dump, so comments and formatting don't count)
+#     of the scene's classes and of the repo modules they import,
+#   - the bytes of every asset file named in that source,
+#   - the render pipeline: the renderer class, the modules in PIPELINE_MODULES
+#     and the repo modules they import (these decide pixels and timing without
+#     being imported by the scenes),
+#   - the render settings (including the random seed) and the manim version.
+# A scene with a `section` attribute only depends on its own `<section>_section`
+# method, not on the other sections of the same class. The same keys identify
+# scene checkpoints (see checkpoints.py), which depend on the sections played
+# so far.
+#
+# Entries are plain files in a directory that several machines can share.
+# Writes go through a temporary file and os.replace, hits refresh the file's
+# mtime, and the least recently used entries are evicted past a size limit.
+
+ROOT = Path(__file__).resolve().parent
+
+DEFAULT_CACHE_DIR = os.environ.get("RENDER_CACHE_DIR", str(ROOT / ".render_cache"))
+DEFAULT_MAX_BYTES = 20 * 1024 ** 3
+
+# Renderer, camera, still segments and chunking. The driver render_all.py is
+# left out: what it decides (renderer class, seed) is passed in explicitly.
+PIPELINE_MODULES = ["static_holds", "chunked_render"]
+DRIVER = ROOT / "render_all.py"
+
+
+def _normalised(node):
+    return ast.dump(node, annotate_fields=False, include_attributes=False)
+
+
+def _local_module_path(name):
+    path = ROOT / (name.split(".")[0] + ".py")
+    return path if path.exists() else None
+
+
+def _imported_local_modules(tree):
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names.add(node.module)
+    return sorted(path for path in map(_local_module_path, names) if path)
+
+
+def _module_dependencies(path, seen=None):
+    # The module itself and every repo module it imports, transitively
+    seen = set() if seen is None else seen
+    if path in seen:
+        return seen
+    seen.add(path)
+    tree = ast.parse(path.read_text(encoding="utf-8"))
+    for dep in _imported_local_modules(tree):
+        _module_dependencies(dep, seen)
+    return seen
+
+
+def _pipeline_dependencies(renderer_cls=None):
+    names = list(PIPELINE_MODULES)
+    if renderer_cls is not None:
+        names.append(renderer_cls.__module__)
+    seen = {DRIVER}
+    for path in filter(None, map(_local_module_path, names)):
+        _module_dependencies(path, seen)
+    return seen - {DRIVER}
+
+
+def _class_source(cls, sections):
+    tree = ast.parse(textwrap.dedent(inspect.getsource(cls)))
+    class_def = tree.body[0]
+    # Drop the methods of sections not in `sections` (None keeps them all)
+    class_def.body = [
+        node for node in class_def.body
+        if not (
+            isinstance(node, ast.FunctionDef)
+            and node.name.endswith("_section")
+            and sections is not None
+            and node.name[:-len("_section")] not in sections
+        )
+    ]
+    return class_def
+
+
+def _referenced_assets(nodes):
+    assets = set()
+    for root in nodes:
+        for node in ast.walk(root):
+            if isinstance(node, ast.Constant) and isinstance(node.value, str) and "/" in node.value:
+                path = ROOT / node.value
+                if path.is_file():
+                    assets.add(path)
+    return sorted(assets)
+
+
+def _file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def scene_cache_key(scene_cls, settings, sections=None, renderer_cls=None):
+    # Hex digest identifying one rendered movie of scene_cls with `settings`
+    # (a dict of render options such as the quality) and renderer_cls.
+    # `sections` limits the section methods that count; by default that is
+    # the scene's own section.
+    import manim
+
+    if sections is None:
+        section = getattr(scene_cls, "section", None)
+        sections = None if section is None else {section}
+    scene_module = sys.modules[scene_cls.__module__]
+    module_path = Path(inspect.getfile(scene_module)).resolve()
+
+    class_defs = [
+        _class_source(cls, sections)
+        for cls in scene_cls.__mro__
+        if cls.__module__ == scene_cls.__module__
+    ]
+    # Module-level code of the scene module without its classes
+    module_tree = ast.parse(module_path.read_text(encoding="utf-8"))
+    module_tree.body = [node for node in module_tree.body if not isinstance(node, ast.ClassDef)]
+
+    digest = hashlib.sha256()
+    digest.update(f"manim {manim.__version__}\n".encode())
+    digest.update(repr(sorted(settings.items())).encode())
+    if renderer_cls is not None:
+        digest.update(f"renderer {renderer_cls.__module__}.{renderer_cls.__qualname__}\n".encode())
+    digest.update(_normalised(module_tree).encode())
+    for class_def in class_defs:
+        digest.update(_normalised(class_def).encode())
+    dependencies = _module_dependencies(module_path) | _pipeline_dependencies(renderer_cls)
+    for dep in sorted(dependencies - {module_path}):
+        digest.update(dep.name.encode())
+        digest.update(_normalised(ast.parse(dep.read_text(encoding="utf-8"))).encode())
+    for asset in _referenced_assets(class_defs + [module_tree]):
+        digest.update(str(asset.relative_to(ROOT)).encode())
+        digest.update(_file_digest(asset).encode())
+    return digest.hexdigest()
+
+
+class RenderCache:
+    # sidecar_suffixes: files stored and evicted together with each movie,
+    # found next to it under the same name with these suffixes
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES, suffix=".mp4",
+                 sidecar_suffixes=()):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self.sidecar_suffixes = tuple(sidecar_suffixes)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def path_for(self, key):
+        return self.directory / key[:2] / f"{key}{self.suffix}"
+
+    def get(self, key):
+        # Path of the cached movie, or None. Marks the entry as recently used.
+        path = self.path_for(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    @staticmethod
+    def _copy_atomic(source, path):
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        os.close(fd)
+        try:
+            shutil.copyfile(source, tmp)
+            os.replace(tmp, path)
+        except BaseException:
+            os.remove(tmp)
+            raise
+
+    def put(self, key, movie_path):
+        path = self.path_for(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Sidecars first, so a movie in the cache always has its sidecars
+        for suffix in self.sidecar_suffixes:
+            sidecar = Path(movie_path).with_suffix(suffix)
+            if sidecar.exists():
+                self._copy_atomic(sidecar, path.with_suffix(suffix))
+        self._copy_atomic(movie_path, path)
+        self.evict()
+        return path
+
+    def entries(self):
+        entries = []
+        for path in self.directory.glob(f"*/*{self.suffix}"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue  # removed by another machine meanwhile
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def evict(self):
+        # Remove least recently used entries until the cache fits max_bytes
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            for victim in [path] + [path.with_suffix(suffix) for suffix in self.sidecar_suffixes]:
+                try:
+                    victim.unlink()
+                except FileNotFoundError:
+                    pass
+            total -= size
@@ -0,0 +1,294 @@
+import numpy as np
+
+from distances import BATCH_ELEMENTS, normalize_rows
+
+# Exact top-k cosine retrieval over a catalog of feature vectors.
+# Rows are L2-normalised once when they are added (float32 by default), so a
+# query is a matrix-vector product followed by a partial sort of the scores.
+# The catalog is scanned in blocks of rows: each block keeps only its own top
+# k (argpartition), and the candidates of all blocks are ranked at the end.
+# Queries are scored QUERY_BLOCK at a time, so a batch reads the catalog once
+# per block of queries instead of once per query.
+
+QUERY_BLOCK = 64
+
+
+def _top_k_rows(scores, k):
+    # Indices of the k largest scores in each row, best first
+    k = min(k, scores.shape[1])
+    if k < scores.shape[1]:
+        part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        part = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+    part_scores = np.take_along_axis(scores, part, axis=1)
+    ranked = np.argsort(-part_scores, axis=1, kind="stable")
+    return np.take_along_axis(part, ranked, axis=1), np.take_along_axis(part_scores, ranked, axis=1)
+
+
+def _block_top_k(scores, k):
+    # (indices, scores) of the k largest scores in each row, unordered
+    if k >= scores.shape[1]:
+        return np.broadcast_to(np.arange(scores.shape[1]), scores.shape), scores
+    part = np.argpartition(scores, scores.shape[1] - k, axis=1)[:, -k:]
+    return part, np.take_along_axis(scores, part, axis=1)
+
+
+class CosineIndex:
+    def __init__(self, vectors=None, ids=None, dtype=np.float32):
+        self.dtype = np.dtype(dtype)
+        self._size = 0
+        self._matrix = None
+        self._ids = np.empty(0, dtype=np.int64)
+        if vectors is not None:
+            self.add(vectors, ids)
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def dim(self):
+        return None if self._matrix is None else self._matrix.shape[1]
+
+    @property
+    def matrix(self):
+        return None if self._matrix is None else self._matrix[:self._size]
+
+    @property
+    def ids(self):
+        return self._ids[:self._size]
+
+    def _reserve(self, extra, dim, id_dtype):
+        needed = self._size + extra
+        if self._matrix is not None and needed <= len(self._matrix) and np.can_cast(id_dtype, self._ids.dtype):
+            return
+        # Grow geometrically so repeated small adds stay amortised O(1) per row
+        capacity = max(needed, 2 * self._size)
+        id_dtype = np.result_type(self._ids.dtype, id_dtype) if self._size else id_dtype
+        matrix = np.empty((capacity, dim), dtype=self.dtype)
+        ids = np.empty(capacity, dtype=id_dtype)
+        if self._size:
+            matrix[:self._size] = self.matrix
+            ids[:self._size] = self.ids
+        self._matrix, self._ids = matrix, ids
+
+    def add(self, vectors, ids=None):
+        # Append vectors to the catalog; ids default to their insertion position
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=float))
+        if self.matrix is not None and vectors.shape[1] != self.dim:
+            raise ValueError(f"expected {self.dim}-dimensional vectors, got {vectors.shape[1]}")
+        if ids is None:
+            ids = np.arange(len(self), len(self) + len(vectors))
+        ids = np.asarray(ids)
+        if len(ids) != len(vectors):
+            raise ValueError("ids must have one entry per vector")
+
+        self._reserve(len(vectors), vectors.shape[1], ids.dtype)
+        end = self._size + len(vectors)
+        self._matrix[self._size:end] = normalize_rows(vectors)
+        self._ids[self._size:end] = ids
+        self._size = end
+        return ids
+
+    def scores(self, queries):
+        # Cosine similarity of each query against the whole catalog
+        queries = normalize_rows(np.asarray(queries, dtype=float)).astype(self.dtype)
+        return queries @ self.matrix.T
+
+    def query(self, queries, k=10):
+        # Returns (ids, similarities) of the k most similar catalog entries.
+        # A single query vector gives 1-D results, a batch gives (m, k) arrays.
+        if not len(self):
+            raise ValueError("the index is empty")
+        queries = np.asarray(queries, dtype=float)
+        single = queries.ndim == 1
+        queries = np.atleast_2d(queries)
+        if queries.shape[1] != self.dim:
+            raise ValueError(f"expected {self.dim}-dimensional queries, got {queries.shape[1]}")
+        k = int(k)
+        if k < 1:
+            raise ValueError("k must be at least 1")
+
+        k = min(k, len(self))
+        queries = normalize_rows(queries).astype(self.dtype)
+        out_ids = np.empty((len(queries), k), dtype=self._ids.dtype)
+        out_scores = np.empty((len(queries), k), dtype=self.dtype)
+        for start in range(0, len(queries), QUERY_BLOCK):
+            rows, block_scores = self._top_k(queries[start:start + QUERY_BLOCK], k)
+            out_ids[start:start + QUERY_BLOCK] = self._ids[rows]
+            out_scores[start:start + QUERY_BLOCK] = block_scores
+        if single:
+            return out_ids[0], out_scores[0]
+        return out_ids, out_scores
+
+    def _top_k(self, queries, k):
+        # (catalog rows, scores) of the k best matches of normalised queries
+        matrix = self.matrix
+        # Bound the (queries x rows) score block
+        block_rows = max(k, BATCH_ELEMENTS // len(queries))
+        candidates, candidate_scores = [], []
+        for start in range(0, len(matrix), block_rows):
+            rows, scores = _block_top_k(queries @ matrix[start:start + block_rows].T, k)
+            candidates.append(rows + start)
+            candidate_scores.append(scores)
+        candidates = np.concatenate(candidates, axis=1)
+        ranked, scores = _top_k_rows(np.concatenate(candidate_scores, axis=1), k)
+        return np.take_along_axis(candidates, ranked, axis=1), scores
+
+
+class CosineLSHIndex:
+    # Approximate cosine top-k with random-hyperplane hashing.
+    # Each of n_tables hash tables has band_bits random hyperplanes, and a
+    # vector's key in that table is the signs of its projections onto them,
+    # packed into an integer. A query only looks at rows that share a key
+    # with it in at least one table. Rows found in more tables are likelier
+    # neighbours, so when there are more than `candidates * k` hits, the
+    # ones found in the most tables are kept; those are re-ranked with exact
+    # cosine similarity. When fewer than k rows are found, the whole catalog
+    # is ranked.
+    #
+    # Each table is stored as its keys sorted, with the matching rows, so a
+    # lookup is a binary search. Wider bands give smaller buckets (about
+    # n / 2**band_bits rows each); more tables find more true neighbours.
+    #
+    # The defaults were picked with bench_retrieval.py: on 1M clustered
+    # 32-dimensional vectors a top-10 query takes about 0.6 ms with recall
+    # 0.96, against about 21 ms for CosineIndex. Hashing only pays off for
+    # data with structure; on isotropic random vectors the true neighbours
+    # are barely closer than any other row, recall drops below 0.2, and
+    # CosineIndex is the right choice.
+
+    def __init__(self, dim, n_tables=32, band_bits=16, candidates=20, seed=0, dtype=np.float32):
+        if not 1 <= band_bits <= 16:
+            raise ValueError("band_bits must be between 1 and 16")
+        self.dim = int(dim)
+        self.n_tables = int(n_tables)
+        self.band_bits = int(band_bits)
+        self.candidates = int(candidates)
+        self.dtype = np.dtype(dtype)
+        rng = np.random.default_rng(seed)
+        self.hyperplanes = rng.standard_normal((self.dim, self.n_tables * self.band_bits)).astype(self.dtype)
+        # Keys of 16 bits or less sort with a radix sort
+        self._key_dtype = np.dtype("<u1" if self.band_bits <= 8 else "<u2")
+
+        self._size = 0
+        self._vectors = np.empty((0, self.dim), dtype=self.dtype)
+        self._keys = np.empty((0, self.n_tables), dtype=self._key_dtype)
+        self._ids = np.empty(0, dtype=np.int64)
+        # (sorted keys, rows) per table, rebuilt on the first query after an add
+        self._tables = None
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def ids(self):
+        return self._ids[:self._size]
+
+    def keys(self, vectors):
+        # (rows, n_tables) bucket keys of the given vectors
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=self.dtype))
+        keys = np.empty((len(vectors), self.n_tables), dtype=self._key_dtype)
+        # Bound the (rows x hyperplanes) projection block
+        step = max(1, BATCH_ELEMENTS // self.hyperplanes.shape[1])
+        for start in range(0, len(vectors), step):
+            bits = vectors[start:start + step] @ self.hyperplanes > 0
+            bits = bits.reshape(len(bits), self.n_tables, self.band_bits)
+            packed = np.packbits(bits, axis=2, bitorder="little")
+            keys[start:start + step] = packed.view(self._key_dtype)[:, :, 0]
+        return keys
+
+    def _reserve(self, extra, id_dtype):
+        needed = self._size + extra
+        if needed <= len(self._vectors) and np.can_cast(id_dtype, self._ids.dtype):
+            return
+        # Grow geometrically so repeated small adds stay amortised O(1) per row
+        capacity = max(needed, 2 * len(self._vectors), 1024)
+
+        def grown(arr, dtype=None):
+            out = np.empty((capacity,) + arr.shape[1:], dtype=dtype or arr.dtype)
+            out[:self._size] = arr[:self._size]
+            return out
+
+        self._vectors = grown(self._vectors)
+        self._keys = grown(self._keys)
+        id_dtype = np.result_type(self._ids.dtype, id_dtype) if self._size else id_dtype
+        self._ids = grown(self._ids, id_dtype)
+
+    def add(self, vectors, ids=None):
+        # Append vectors incrementally; ids default to their insertion position
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=float))
+        if vectors.shape[1] != self.dim:
+            raise ValueError(f"expected {self.dim}-dimensional vectors, got {vectors.shape[1]}")
+        if ids is None:
+            ids = np.arange(self._size, self._size + len(vectors))
+        ids = np.asarray(ids)
+        if len(ids) != len(vectors):
+            raise ValueError("ids must have one entry per vector")
+
+        self._reserve(len(vectors), ids.dtype)
+        rows = normalize_rows(vectors).astype(self.dtype)
+        end = self._size + len(vectors)
+        self._vectors[self._size:end] = rows
+        self._keys[self._size:end] = self.keys(rows)
+        self._ids[self._size:end] = ids
+        self._size = end
+        self._tables = None
+        return ids
+
+    def _sorted_tables(self):
+        if self._tables is None:
+            keys = np.ascontiguousarray(self._keys[:self._size].T)
+            order = np.argsort(keys, axis=1, kind="stable")
+            self._tables = (np.take_along_axis(keys, order, axis=1), order)
+        return self._tables
+
+    def _bucket_hits(self, q_keys, n_candidates):
+        # Rows sharing a bucket with the query in at least one table, at most
+        # n_candidates of them, preferring rows found in more tables
+        sorted_keys, rows = self._sorted_tables()
+        hits = []
+        for table_keys, table_rows, key in zip(sorted_keys, rows, q_keys):
+            lo, hi = np.searchsorted(table_keys, key, "left"), np.searchsorted(table_keys, key, "right")
+            hits.append(table_rows[lo:hi])
+        hits, counts = np.unique(np.concatenate(hits), return_counts=True)
+        if len(hits) > n_candidates:
+            hits = hits[np.argpartition(-counts, n_candidates - 1)[:n_candidates]]
+        return hits
+
+    def _query_one(self, q, q_keys, k, n_candidates):
+        candidates = self._bucket_hits(q_keys, n_candidates)
+        if len(candidates) < k:
+            candidates = np.arange(self._size)
+            exact = self._vectors[:self._size] @ q
+        else:
+            exact = self._vectors[candidates] @ q
+        rows, scores = _top_k_rows(exact[np.newaxis], k)
+        return self._ids[candidates[rows[0]]], scores[0]
+
+    def query(self, queries, k=10, candidates=None):
+        # Same return shapes as CosineIndex.query. `candidates` overrides the
+        # index default for this call.
+        if not self._size:
+            raise ValueError("the index is empty")
+        queries = np.asarray(queries, dtype=float)
+        single = queries.ndim == 1
+        queries = np.atleast_2d(queries)
+        if queries.shape[1] != self.dim:
+            raise ValueError(f"expected {self.dim}-dimensional queries, got {queries.shape[1]}")
+        k = int(k)
+        if k < 1:
+            raise ValueError("k must be at least 1")
+
+        k = min(k, self._size)
+        per_k = self.candidates if candidates is None else int(candidates)
+        n_candidates = min(self._size, max(k, per_k * k))
+        normalized = normalize_rows(queries).astype(self.dtype)
+        query_keys = self.keys(normalized)
+
+        out_ids = np.empty((len(queries), k), dtype=self._ids.dtype)
+        out_scores = np.empty((len(queries), k), dtype=self.dtype)
+        for row, (q, q_keys) in enumerate(zip(normalized, query_keys)):
+            out_ids[row], out_scores[row] = self._query_one(q, q_keys, k, n_candidates)
+        if single:
+            return out_ids[0], out_scores[0]
+        return out_ids, out_scores
@@ -0,0 +1,176 @@
+import heapq
+from collections import Counter
+
+import numpy as np
+
+# KD-tree over a fixed set of points for k-nearest and radius queries.
+# Nodes live in flat arrays and every node keeps its bounding box, so a query
+# only visits the boxes that can still contain a closer point. Points are
+# stored in tree order, which makes each leaf a contiguous slice that is
+# scanned with a single vectorized distance computation.
+
+
+class KDTree:
+    def __init__(self, points, labels=None, leaf_size=32):
+        points = np.asarray(points, dtype=float)
+        if points.ndim != 2 or len(points) == 0:
+            raise ValueError("points must be a non-empty (n, d) array")
+        if labels is not None:
+            labels = np.asarray(labels)
+            if len(labels) != len(points):
+                raise ValueError("labels must have one entry per point")
+        self.leaf_size = max(1, int(leaf_size))
+        self.labels = labels
+        self._build(points)
+
+    def __len__(self):
+        return len(self.order)
+
+    def _build(self, points):
+        n, dim = points.shape
+        order = np.arange(n)
+        # Median splits keep every leaf at least half full, which bounds the node count
+        max_nodes = 4 * max(1, -(-n // self.leaf_size))
+        start = np.empty(max_nodes, dtype=np.intp)
+        end = np.empty(max_nodes, dtype=np.intp)
+        left = np.full(max_nodes, -1, dtype=np.intp)
+        right = np.full(max_nodes, -1, dtype=np.intp)
+        lo = np.empty((max_nodes, dim))
+        hi = np.empty((max_nodes, dim))
+
+        count = 1
+        start[0], end[0] = 0, n
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            s, e = start[node], end[node]
+            members = points[order[s:e]]
+            lo[node] = members.min(axis=0)
+            hi[node] = members.max(axis=0)
+            if e - s <= self.leaf_size:
+                continue
+
+            # Split on the widest dimension at the median
+            split_dim = int(np.argmax(hi[node] - lo[node]))
+            mid = (s + e) // 2
+            part = np.argpartition(members[:, split_dim], mid - s)
+            order[s:e] = order[s:e][part]
+
+            for child, (cs, ce) in ((count, (s, mid)), (count + 1, (mid, e))):
+                start[child], end[child] = cs, ce
+                stack.append(child)
+            left[node], right[node] = count, count + 1
+            count += 2
+
+        self.order = order
+        self.points = points[order]
+        self._start, self._end = start[:count], end[:count]
+        self._left, self._right = left[:count], right[:count]
+        self._lo, self._hi = lo[:count], hi[:count]
+
+    def _box_distance_sq(self, node, x):
+        gap = np.maximum(self._lo[node] - x, 0.0) + np.maximum(x - self._hi[node], 0.0)
+        return float(gap @ gap)
+
+    def _box_max_distance_sq(self, node, x):
+        far = np.maximum(np.abs(x - self._lo[node]), np.abs(x - self._hi[node]))
+        return float(far @ far)
+
+    def _leaf_distances_sq(self, node, x):
+        diff = self.points[self._start[node]:self._end[node]] - x
+        return np.einsum("ij,ij->i", diff, diff)
+
+    def _query_one(self, x, k):
+        best_d = np.full(k, np.inf)
+        best_i = np.full(k, -1, dtype=np.intp)
+        worst = np.inf
+        heap = [(self._box_distance_sq(0, x), 0)]
+        while heap:
+            box_d, node = heapq.heappop(heap)
+            if box_d >= worst:
+                break
+            if self._left[node] < 0:
+                d = self._leaf_distances_sq(node, x)
+                ids = np.arange(self._start[node], self._end[node])
+                cand_d = np.concatenate([best_d, d])
+                cand_i = np.concatenate([best_i, ids])
+                keep = np.argpartition(cand_d, k - 1)[:k]
+                best_d, best_i = cand_d[keep], cand_i[keep]
+                worst = best_d.max()
+                continue
+            for child in (self._left[node], self._right[node]):
+                child_d = self._box_distance_sq(child, x)
+                if child_d < worst:
+                    heapq.heappush(heap, (child_d, child))
+
+        ranked = np.argsort(best_d, kind="stable")
+        best_d, best_i = best_d[ranked], best_i[ranked]
+        found = best_i >= 0
+        ids = np.full(k, -1, dtype=np.intp)
+        ids[found] = self.order[best_i[found]]
+        return np.sqrt(best_d), ids
+
+    def query(self, x, k=1):
+        # Returns (distances, indices) of the k nearest points, closest first.
+        # Indices refer to the original point order; missing slots are -1.
+        x = np.asarray(x, dtype=float)
+        single = x.ndim == 1
+        queries = x[np.newaxis] if single else x
+        if queries.shape[1] != self.points.shape[1]:
+            raise ValueError("query dimension does not match the indexed points")
+        k = int(k)
+        if k < 1:
+            raise ValueError("k must be at least 1")
+
+        dists = np.empty((len(queries), k))
+        ids = np.empty((len(queries), k), dtype=np.intp)
+        for row, q in enumerate(queries):
+            dists[row], ids[row] = self._query_one(q, k)
+        if single:
+            return dists[0], ids[0]
+        return dists, ids
+
+    def _radius_one(self, x, r_sq):
+        hits = []
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            if self._box_distance_sq(node, x) > r_sq:
+                continue
+            s, e = self._start[node], self._end[node]
+            # Whole box inside the ball: take every point without measuring
+            if self._box_max_distance_sq(node, x) <= r_sq:
+                hits.append(np.arange(s, e))
+            elif self._left[node] < 0:
+                d = self._leaf_distances_sq(node, x)
+                hits.append(s + np.flatnonzero(d <= r_sq))
+            else:
+                stack.extend((self._left[node], self._right[node]))
+        if not hits:
+            return np.empty(0, dtype=np.intp)
+        return np.sort(self.order[np.concatenate(hits)])
+
+    def query_radius(self, x, r):
+        # Returns the indices of all points within distance r of each query
+        x = np.asarray(x, dtype=float)
+        r_sq = float(r) ** 2
+        if x.ndim == 1:
+            return self._radius_one(x, r_sq)
+        return [self._radius_one(q, r_sq) for q in x]
+
+    def classify(self, x, k=3):
+        # Majority vote of the k nearest labels. Ties go to the label whose
+        # member is closest to the query. Returns (label, Counter of votes).
+        if self.labels is None:
+            raise ValueError("classify needs an index built with labels")
+        _, ids = self.query(x, k=k)
+        if np.ndim(ids) > 1:
+            return [self._vote(row) for row in ids]
+        return self._vote(ids)
+
+    def _vote(self, ids):
+        neighbour_labels = [self.labels[i] for i in ids if i >= 0]
+        votes = Counter(neighbour_labels)
+        top = max(votes.values())
+        winner = next(label for label in neighbour_labels if votes[label] == top)
+        return winner, votes
@@ -0,0 +1,132 @@
+import inspect
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+from manim import config
+from manim.scene.scene_file_writer import SceneFileWriter
+from PIL import Image
+
+from hold_timing import encode_still
+from point_cloud import PointCloudCamera
+from static_layers import StaticLayerRenderer
+
+# Fast path for static holds (self.wait with nothing moving).
+#
+# manim already notices a frozen frame and draws it only once, but then still
+# pushes every one of its frames through the encoder: a self.wait(13) at 60 fps
+# encodes and writes 780 identical frames. With StaticHoldRenderer the partial
+# movie of such a wait is made by ffmpeg from a single looped still image,
+# which costs about as much as one frame.
+#
+# The partial movie stream is opened lazily, on the first frame an animation
+# writes; a wait that never writes a frame gets its still segment instead.
+# Segments use the same codec, pixel format and frame rate as manim's, so
+# combining the partial movies still works by stream copy. Anything other than
+# opaque .mp4 output falls back to manim's normal path.
+#
+# The renderer also records each hold in `holds` (start frame, length and the
+# scene source line that called it), for re-timing holds at the concat stage
+# (see hold_timing.py).
+#
+# It also reuses static background layers between play calls (see
+# static_layers.py).
+#
+#   scene = MyScene(renderer=StaticHoldRenderer())
+
+
+class StillSegmentFileWriter(SceneFileWriter):
+    def __init__(self, *args, **kwargs):
+        self._pending_begin = None
+        self._wrote_still = False
+        super().__init__(*args, **kwargs)
+
+    def begin_animation(self, allow_write=False, file_path=None):
+        self._pending_begin = (allow_write, file_path)
+
+    def _begin_now(self):
+        if self._pending_begin is not None:
+            allow_write, file_path = self._pending_begin
+            self._pending_begin = None
+            super().begin_animation(allow_write, file_path=file_path)
+
+    def write_frame(self, *args, **kwargs):
+        self._begin_now()
+        super().write_frame(*args, **kwargs)
+
+    def end_animation(self, allow_write=False):
+        if self._wrote_still:
+            self._wrote_still = False
+            return
+        self._begin_now()
+        super().end_animation(allow_write)
+
+    def _can_write_still(self):
+        return (
+            self._pending_begin is not None
+            and self._pending_begin[0]
+            and config.write_to_movie
+            and config.movie_file_extension == ".mp4"
+            and not config.transparent
+            and not config.dry_run
+        )
+
+    def write_still(self, frame, num_frames):
+        # Writes the current animation as `frame` held for num_frames frames.
+        # Returns False (writing nothing) when the normal path must be used.
+        if num_frames <= 0 or not self._can_write_still():
+            return False
+        _, file_path = self._pending_begin
+        if file_path is None:
+            file_path = self.partial_movie_files[self.renderer.num_plays]
+        self._pending_begin = None
+
+        with tempfile.TemporaryDirectory() as tmp:
+            still = Path(tmp) / "still.png"
+            Image.fromarray(np.asarray(frame)[..., :3], "RGB").save(still)
+            encode_still(still, num_frames, config.frame_rate, file_path)
+        self._wrote_still = True
+        return True
+
+
+class StaticHoldRenderer(StaticLayerRenderer):
+    def __init__(self, file_writer_class=StillSegmentFileWriter, **kwargs):
+        kwargs.setdefault("skip_animations", config.skip_animations)
+        # Draws PointCloud mobjects as discs
+        kwargs.setdefault("camera_class", PointCloudCamera)
+        super().__init__(file_writer_class=file_writer_class, **kwargs)
+        self.holds = []
+        self._scene_file = None
+
+    def init_scene(self, scene):
+        super().init_scene(scene)
+        self._scene_file = inspect.getfile(type(scene))
+
+    def _hold_source(self):
+        # "file:line" of the scene code that started the hold
+        frame = sys._getframe(1)
+        while frame is not None:
+            if frame.f_code.co_filename == self._scene_file:
+                return f"{Path(self._scene_file).name}:{frame.f_lineno}"
+            frame = frame.f_back
+        return None
+
+    def freeze_current_frame(self, duration):
+        dt = 1 / self.camera.frame_rate
+        num_frames = int(duration / dt)
+        if not self._original_skipping_status:
+            # Plays taken from manim's partial movie cache are skipped but have
+            # already advanced the time
+            start = self.time - duration if self.skip_animations else self.time
+            self.holds.append({
+                "play": self.num_plays,
+                "source": self._hold_source(),
+                "start_frame": round(start / dt),
+                "frames": num_frames,
+            })
+        if self.skip_animations or not self.file_writer.write_still(self.get_frame(), num_frames):
+            super().freeze_current_frame(duration)
+            return
+        # What add_frame would have done, minus writing each frame
+        self.time += num_frames * dt
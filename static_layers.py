@@ -0,0 +1,69 @@
+import hashlib
+
+import numpy as np
+from manim.renderer.cairo_renderer import CairoRenderer
+
+# Reuse of the static background layer between play calls.
+#
+# At the start of every play call manim draws the mobjects the animations do
+# not touch into a static image once, and each frame of the call starts from
+# a copy of it, so only the moving mobjects are drawn per frame. But the
+# static image is drawn again for every play call, even when the backdrop
+# (a NumberPlane with axes, the city grid with its buildings) is exactly the
+# same as in the previous call.
+#
+# StaticLayerRenderer fingerprints the static mobjects (their points, colours,
+# stroke widths and images, in drawing order) together with the camera frame,
+# and reuses the previous static image when the fingerprint matches.
+
+# Mobject attributes that change how it is drawn, besides its points
+DRAWN_ATTRIBUTES = [
+    "fill_rgbas", "stroke_rgbas", "background_stroke_rgbas",
+    "stroke_width", "background_stroke_width", "sheen_factor", "sheen_direction",
+    "pixel_array", "rgbas", "radii", "z_index",
+]
+
+
+def _update(digest, value):
+    if value is None:
+        digest.update(b"-")
+    else:
+        digest.update(np.ascontiguousarray(value).tobytes())
+
+
+def layer_fingerprint(camera, mobjects):
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr((
+        camera.pixel_array.shape,
+        np.asarray(camera.frame_center).tolist(),
+        camera.frame_width,
+        camera.frame_height,
+        str(getattr(camera, "background_color", None)),
+        getattr(camera, "background_opacity", None),
+    )).encode())
+    for mobject in mobjects:
+        for sub in mobject.get_family():
+            digest.update(type(sub).__name__.encode())
+            _update(digest, sub.points)
+            for name in DRAWN_ATTRIBUTES:
+                _update(digest, getattr(sub, name, None))
+    return digest.digest()
+
+
+class StaticLayerRenderer(CairoRenderer):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._static_layer = None
+        self._static_fingerprint = None
+
+    def save_static_frame_data(self, scene, static_mobjects):
+        if not static_mobjects or self.skip_animations:
+            return super().save_static_frame_data(scene, static_mobjects)
+        fingerprint = layer_fingerprint(self.camera, static_mobjects)
+        if fingerprint == self._static_fingerprint:
+            self.static_image = self._static_layer
+            return self.static_image
+        super().save_static_frame_data(scene, static_mobjects)
+        self._static_layer = self.static_image
+        self._static_fingerprint = fingerprint
+        return self.static_image
@@ -0,0 +1,60 @@
+from pathlib import Path
+
+import pytest
+
+manim = pytest.importorskip("manim")
+from manim import RIGHT, Dot, FadeIn, Scene, tempconfig  # noqa: E402
+
+from checkpoints import SEGMENTS, SectionCheckpoints  # noqa: E402
+
+
+class TwoSectionScene(Scene):
+    # Plays the sections in `names`, resuming from a checkpoint if it can
+    names = ["first", "second"]
+    checkpoint_dir = None
+
+    def construct(self):
+        checkpoints = SectionCheckpoints(self, self.names, ["dot"], directory=self.checkpoint_dir)
+        self.resumed_at = checkpoints.resume()
+        for name in self.names[self.resumed_at:]:
+            getattr(self, f"{name}_section")()
+            checkpoints.save(name)
+
+    def first_section(self):
+        self.dot = Dot()
+        self.play(FadeIn(self.dot))
+
+    def second_section(self):
+        self.play(self.dot.animate.shift(RIGHT))
+
+
+def _render(monkeypatch, names, checkpoint_dir):
+    # Set on the class, not in a subclass, so the checkpoint keys match
+    monkeypatch.setattr(TwoSectionScene, "names", names)
+    monkeypatch.setattr(TwoSectionScene, "checkpoint_dir", checkpoint_dir)
+    scene = TwoSectionScene()
+    scene.render()
+    return scene
+
+
+def test_resume_then_play_another_section(tmp_path, monkeypatch):
+    checkpoint_dir = tmp_path / "checkpoints"
+    with tempconfig({"quality": "low_quality", "media_dir": str(tmp_path / "media"),
+                     "progress_bar": "none", "verbosity": "WARNING"}):
+        first = _render(monkeypatch, ["first"], checkpoint_dir)
+        assert first.resumed_at == 0
+        assert len(list((checkpoint_dir / SEGMENTS).iterdir())) == 1
+
+        resumed = _render(monkeypatch, ["first", "second"], checkpoint_dir)
+
+    assert resumed.resumed_at == 1
+    writer = resumed.renderer.file_writer
+    files = writer.partial_movie_files
+    assert resumed.renderer.num_plays == 2
+    assert len(files) == 2
+    # The first play call comes from the checkpoint, the second was rendered
+    assert Path(files[0]).parent == checkpoint_dir / SEGMENTS
+    assert Path(files[1]).parent != checkpoint_dir / SEGMENTS
+    assert all(Path(path).exists() for path in files)
+    assert writer.sections[-1].partial_movie_files == files
+    assert Path(writer.movie_file_path).exists()
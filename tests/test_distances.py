@@ -0,0 +1,28 @@
+import numpy as np
+
+from distances import euclidean_distance_matrix_blocked
+
+
+def test_blocked_float32_input_matches_float64(tmp_path):
+    # Close rows far from the origin: in float32 the cancellation error of
+    # ||a||^2 + ||b||^2 - 2 a.b is about as large as their distances
+    rng = np.random.default_rng(0)
+    x = 100 * rng.standard_normal((1, 16)) + 1e-3 * rng.standard_normal((300, 16))
+    x32 = x.astype(np.float32)
+    x64 = x32.astype(np.float64)
+
+    from32 = euclidean_distance_matrix_blocked(x32, x32, tmp_path / "d32.npy",
+                                               block_rows=128, block_cols=96, dtype=np.float64)
+    from64 = euclidean_distance_matrix_blocked(x64, x64, tmp_path / "d64.npy",
+                                               block_rows=128, block_cols=96, dtype=np.float64)
+    exact = np.sqrt(((x64[:, None, :] - x64[None, :, :]) ** 2).sum(axis=2))
+    np.testing.assert_array_equal(from32, from64)
+    np.testing.assert_allclose(from32, exact, atol=1e-4)
+
+
+def test_blocked_self_distances_are_zero(tmp_path):
+    x = np.random.default_rng(1).standard_normal((250, 8)).astype(np.float32) * 1000
+    result = euclidean_distance_matrix_blocked(x, x, tmp_path / "d.npy", block_rows=64, block_cols=100)
+    assert result.dtype == np.float32
+    assert np.all(np.diagonal(result) == 0)
+    assert np.all(result[~np.eye(len(x), dtype=bool)] > 0)
@@ -0,0 +1,174 @@
+import ast
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+
+# LaTeX pre-pass for the scene modules.
+#
+# manim compiles every MathTex/Tex on first use with its own latex + dvisvgm
+# run, one after the other, and keeps the SVG in media/Tex under a hash of the
+# generated .tex file. This pre-pass
+#   1. collects the TeX strings a module will need by reading its source
+#      (MathTex/Tex calls with literal strings, axis labels, number glyphs),
+#   2. lets manim turn each one into the exact .tex file it would compile,
+#      including the extra files MathTex makes for each of its parts,
+#   3. compiles the ones without an SVG yet in a pool of worker threads
+#      (latex and dvisvgm run as subprocesses, so threads run them in parallel).
+# Scenes rendered afterwards find every SVG already in the hash-keyed cache.
+# Strings built at runtime (f-strings, variables) are left to manim as before.
+#
+# Render workers compile those in a tex_dir of their own (worker_tex_dir):
+# manim deletes every non-SVG file of the tex_dir after each compile, which in
+# a shared media/Tex can remove the .dvi another worker is still converting.
+
+ROOT = Path(__file__).resolve().parent
+
+TEX_CLASSES = {"MathTex", "Tex", "SingleStringMathTex"}
+AXIS_LABEL_METHODS = {"get_axis_labels", "get_x_axis_label", "get_y_axis_label"}
+# Keyword arguments that change the generated .tex file
+TEX_KWARGS = {"tex_environment", "arg_separator", "substrings_to_isolate"}
+# Characters DecimalNumber builds axis numbers from
+NUMBER_GLYPHS = list("0123456789-.")
+
+
+def _literal(node):
+    # Value of a node built only from literals and string concatenation
+    if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Add):
+        return _literal(node.left) + _literal(node.right)
+    return ast.literal_eval(node)
+
+
+def _call_name(func):
+    if isinstance(func, ast.Name):
+        return func.id
+    if isinstance(func, ast.Attribute):
+        return func.attr
+    return None
+
+
+def collect_tex_calls(paths):
+    # [(class name, args, kwargs)] for every TeX mobject the sources build
+    # from literal strings
+    calls = []
+    for path in paths:
+        tree = ast.parse(Path(path).read_text(encoding="utf-8"))
+        for node in ast.walk(tree):
+            if not isinstance(node, ast.Call):
+                continue
+            name = _call_name(node.func)
+            try:
+                if name in TEX_CLASSES:
+                    args = tuple(_literal(arg) for arg in node.args)
+                    kwargs = {kw.arg: _literal(kw.value) for kw in node.keywords if kw.arg in TEX_KWARGS}
+                    calls.append((name, args, kwargs))
+                elif name in AXIS_LABEL_METHODS:
+                    for value in list(node.args) + [kw.value for kw in node.keywords]:
+                        label = _literal(value)
+                        if isinstance(label, str):
+                            calls.append(("MathTex", (label,), {}))
+            except (ValueError, TypeError, SyntaxError):
+                continue  # built at runtime, manim compiles it on demand
+    calls.extend(("SingleStringMathTex", (glyph,), {}) for glyph in NUMBER_GLYPHS)
+    return calls
+
+
+@contextmanager
+def _recording_tex_files(jobs, placeholder_svg):
+    # Swap manim's compile step for one that only remembers the .tex file
+    from manim.mobject.text import tex_mobject
+    from manim.utils.tex_file_writing import generate_tex_file
+
+    original = tex_mobject.tex_to_svg_file
+
+    def record(expression, environment=None, tex_template=None):
+        from manim import config
+
+        if tex_template is None:
+            tex_template = config["tex_template"]
+        tex_file = generate_tex_file(expression, environment, tex_template)
+        jobs[tex_file] = tex_template
+        return placeholder_svg
+
+    tex_mobject.tex_to_svg_file = record
+    try:
+        yield
+    finally:
+        tex_mobject.tex_to_svg_file = original
+
+
+def resolve_tex_files(calls):
+    # {tex file: template} for every .tex file manim would compile for `calls`
+    import manim
+    from manim import config
+
+    tex_dir = Path(config.get_dir("tex_dir"))
+    tex_dir.mkdir(parents=True, exist_ok=True)
+    # A single tiny path, so MathTex can split it into parts without errors
+    placeholder_svg = tex_dir / "tex_batch_placeholder.svg"
+    placeholder_svg.write_text(
+        '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 1 1"><path d="M0 0L1 0L1 1Z"/></svg>'
+    )
+    jobs = {}
+    with _recording_tex_files(jobs, placeholder_svg):
+        for name, args, kwargs in calls:
+            try:
+                getattr(manim, name)(*args, **kwargs)
+            except Exception:
+                continue  # left for manim to handle (and report) at render time
+    placeholder_svg.unlink()
+    return jobs
+
+
+def _compile(tex_file, tex_template):
+    from manim.utils.tex_file_writing import compile_tex, convert_to_svg
+
+    dvi_file = compile_tex(tex_file, tex_template.tex_compiler, tex_template.output_format)
+    return convert_to_svg(dvi_file, tex_template.output_format)
+
+
+def precompile_tex(paths, workers=None):
+    # Compile every missing SVG the given source files need. Returns the
+    # number of .tex files compiled.
+    from manim import config
+    from manim.utils.tex_file_writing import delete_nonsvg_files
+
+    jobs = resolve_tex_files(collect_tex_calls(paths))
+    missing = {tex: template for tex, template in jobs.items() if not tex.with_suffix(".svg").exists()}
+    if missing:
+        with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+            list(pool.map(lambda job: _compile(*job), missing.items()))
+    # Cleaning up once at the end keeps one job from deleting another's files
+    if not config["no_latex_cleanup"]:
+        delete_nonsvg_files()
+    return len(missing)
+
+
+def _link(source, target):
+    try:
+        os.link(source, target)
+    except FileExistsError:
+        pass
+    except OSError:
+        shutil.copyfile(source, target)
+
+
+@contextmanager
+def worker_tex_dir(media_dir):
+    # A private tex_dir for one render, seeded with links to the SVGs of the
+    # shared media/Tex. SVGs compiled during the render are linked back into
+    # the shared directory on the way out, for later renders.
+    shared = Path(media_dir) / "Tex"
+    shared.mkdir(parents=True, exist_ok=True)
+    private = Path(tempfile.mkdtemp(prefix="Tex_", dir=media_dir))
+    try:
+        for svg in shared.glob("*.svg"):
+            _link(svg, private / svg.name)
+        yield private
+        for svg in private.glob("*.svg"):
+            if not (shared / svg.name).exists():
+                _link(svg, shared / svg.name)
+    finally:
+        shutil.rmtree(private, ignore_errors=True)
@@ -0,0 +1,86 @@
+import hashlib
+import os
+import pickle
+from collections import OrderedDict
+from pathlib import Path
+
+from manim import DEFAULT_FONT_SIZE, NORMAL, Text, __version__ as MANIM_VERSION
+
+# Process-wide cache of parsed Text mobjects.
+#
+# Building a Text runs Pango, writes an SVG and parses it into paths, even for
+# a label like Text("A", font_size=20) that a scene creates many times.
+# cached_text() builds each distinct label once and hands out copies. Parsed
+# labels are kept in memory (bounded LRU) and pickled to disk, so other
+# processes and later renders skip the parse as well. Colour is applied to the
+# copy, so the same glyphs in another colour share one entry.
+
+CACHE_DIR = Path(os.environ.get("TEXT_CACHE_DIR", Path(__file__).resolve().parent / ".text_cache"))
+MAX_ENTRIES = 512
+
+_memory = OrderedDict()
+
+
+def _cache_key(text, kwargs):
+    key = {
+        "text": text,
+        "font": kwargs.get("font", ""),
+        "font_size": kwargs.get("font_size", DEFAULT_FONT_SIZE),
+        "weight": kwargs.get("weight", NORMAL),
+        "slant": kwargs.get("slant", NORMAL),
+    }
+    # Any other option (line_spacing, t2c, ...) also changes the result
+    key.update({name: value for name, value in kwargs.items() if name not in key})
+    return repr(sorted(key.items()))
+
+
+def _disk_path(key):
+    digest = hashlib.sha256(f"{MANIM_VERSION}\n{key}".encode()).hexdigest()
+    return CACHE_DIR / digest[:2] / f"{digest}.pkl"
+
+
+def _load(key):
+    try:
+        with open(_disk_path(key), "rb") as f:
+            return pickle.load(f)
+    except (OSError, pickle.PickleError, EOFError, AttributeError):
+        return None
+
+
+def _store(key, mob):
+    path = _disk_path(key)
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp, "wb") as f:
+            pickle.dump(mob, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+    except (OSError, pickle.PickleError, TypeError, AttributeError):
+        # The disk copy is only an optimisation
+        if tmp.exists():
+            tmp.unlink()
+
+
+def cached_text(text, color=None, **kwargs):
+    # Drop-in replacement for Text(text, color=..., **kwargs)
+    key = _cache_key(text, kwargs)
+    mob = _memory.get(key)
+    if mob is None:
+        mob = _load(key)
+        if mob is None:
+            mob = Text(text, **kwargs)
+            _store(key, mob)
+        _memory[key] = mob
+        if len(_memory) > MAX_ENTRIES:
+            _memory.popitem(last=False)
+    else:
+        _memory.move_to_end(key)
+
+    copy = mob.copy()
+    if color is not None:
+        copy.set_color(color)
+    return copy
+
+
+def clear_memory_cache():
+    _memory.clear()
@@ -0,0 +1,148 @@
+import math
+
+import numpy as np
+from manim import VMobject, config
+
+# Line charts of long time series.
+#
+# Plotting a series with set_points_as_corners makes one Bezier segment per
+# sample, so a day of tick data becomes millions of anchors that are
+# transformed, copied and drawn on every frame. TimeSeriesLine keeps the raw
+# samples in NumPy arrays (memory-mapped arrays stay memory-mapped) and draws
+# only a downsampled copy sized to the pixel width of the plot:
+#   - "lttb": Largest-Triangle-Three-Buckets, one sample per pixel column,
+#     chosen to keep the visual shape of the line,
+#   - "minmax": the lowest and highest sample of every pixel column, which
+#     keeps every spike.
+# Series shorter than that are drawn sample by sample, exactly like
+# set_points_as_corners. set_window re-downsamples for a new visible x range,
+# so zooming and panning stay bounded by the output resolution too.
+
+
+def downsample_lttb(x, y, n_out):
+    # Indices of n_out samples picked by Largest-Triangle-Three-Buckets
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    # First and last samples are kept; the rest is split into n_out - 2 buckets
+    every = (n - 2) / (n_out - 2)
+    edges = np.append(np.floor(np.arange(n_out - 1) * every).astype(int) + 1, n)
+    indices = np.empty(n_out, dtype=int)
+    indices[0], indices[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        # Triangle with the previous pick and the mean of the next bucket
+        next_x = x[end:edges[i + 2]].mean()
+        next_y = y[end:edges[i + 2]].mean()
+        bucket_x = np.asarray(x[start:end], dtype=float)
+        bucket_y = np.asarray(y[start:end], dtype=float)
+        area = np.abs((x[a] - next_x) * (bucket_y - y[a]) - (x[a] - bucket_x) * (next_y - y[a]))
+        a = start + int(np.argmax(area))
+        indices[i + 1] = a
+    return indices
+
+
+def downsample_minmax(x, y, n_columns, x_min=None, x_max=None):
+    # Indices of the lowest and highest sample in each of n_columns equal
+    # slices of [x_min, x_max], in x order
+    n = len(x)
+    if 2 * n_columns >= n:
+        return np.arange(n)
+    x_min = x[0] if x_min is None else x_min
+    x_max = x[-1] if x_max is None else x_max
+    bounds = np.searchsorted(x, np.linspace(x_min, x_max, n_columns + 1))
+    bounds[-1] = n
+    picked = [0, n - 1]
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        if end > start:
+            column = np.asarray(y[start:end])
+            picked += [start + int(np.argmin(column)), start + int(np.argmax(column))]
+    return np.unique(picked)
+
+
+DOWNSAMPLERS = {"lttb": downsample_lttb, "minmax": downsample_minmax}
+
+
+class _Shared:
+    # Raw samples and axes shared by every copy of a line: animations copy
+    # mobjects, and copying a million samples per animation would defeat the
+    # point
+    def __init__(self, x, y, axes):
+        self.x = x
+        self.y = y
+        self.axes = axes
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+class TimeSeriesLine(VMobject):
+    def __init__(self, axes, x, y, window=None, method="lttb", **kwargs):
+        # x must be increasing. window is the (x_min, x_max) range drawn across
+        # the full width of the axes; by default the axes' own x range.
+        if method not in DOWNSAMPLERS:
+            raise ValueError(f"unknown method {method!r}; choose from {sorted(DOWNSAMPLERS)}")
+        x = np.asarray(x)
+        y = np.asarray(y)
+        if x.shape != y.shape or x.ndim != 1:
+            raise ValueError("x and y must be 1-D arrays of the same length")
+        super().__init__(**kwargs)
+        self.series = _Shared(x, y, axes)
+        self.method = method
+        self.window = tuple(window) if window is not None else tuple(axes.x_range[:2])
+        self.refresh()
+
+    def pixel_columns(self):
+        # Width of the plot in pixels at the current render resolution
+        width = self.series.axes.x_axis.get_width()
+        return max(3, math.ceil(width * config.pixel_width / config.frame_width))
+
+    def visible_indices(self):
+        # Indices of the raw samples drawn for the current window
+        x, y = self.series.x, self.series.y
+        x_min, x_max = self.window
+        # One sample either side, so the line reaches the edges of the window
+        # (refresh clips it there)
+        start = max(0, np.searchsorted(x, x_min, side="left") - 1)
+        end = min(len(x), np.searchsorted(x, x_max, side="right") + 1)
+        if self.method == "minmax":
+            picked = downsample_minmax(x[start:end], y[start:end], self.pixel_columns(), x_min, x_max)
+        else:
+            picked = downsample_lttb(x[start:end], y[start:end], self.pixel_columns())
+        return start + picked
+
+    def _raw_height(self, at):
+        # Height of the line through the raw samples at x = `at`
+        x, y = self.series.x, self.series.y
+        right = np.searchsorted(x, at, side="right")
+        pair = slice(max(0, right - 1), right + 1)
+        return np.interp(at, np.asarray(x[pair], dtype=float), np.asarray(y[pair], dtype=float))
+
+    def refresh(self):
+        indices = self.visible_indices()
+        x = np.asarray(self.series.x[indices], dtype=float)
+        y = np.asarray(self.series.y[indices], dtype=float)
+        x_min, x_max = self.window
+        # The samples either side of the window end the line at its edges, at
+        # the height of the raw line there. The neighbours the downsampling
+        # kept can be far from the edge, so the raw pair around it is used.
+        if len(x) > 1 and x[0] < x_min:
+            y[0], x[0] = self._raw_height(x_min), x_min
+        if len(x) > 1 and x[-1] > x_max:
+            y[-1], x[-1] = self._raw_height(x_max), x_max
+        np.clip(x, x_min, x_max, out=x)
+        # Window coordinates to axes coordinates, then through the (linear) axes
+        axes = self.series.axes
+        axis_min, axis_max = axes.x_range[:2]
+        x = axis_min + (x - x_min) * (axis_max - axis_min) / (x_max - x_min)
+        origin = axes.c2p(0, 0)
+        x_step = axes.c2p(1, 0) - origin
+        y_step = axes.c2p(0, 1) - origin
+        self.set_points_as_corners(origin + x[:, np.newaxis] * x_step + y[:, np.newaxis] * y_step)
+        return self
+
+    def set_window(self, x_min, x_max):
+        # Zoom or pan: show [x_min, x_max] across the axes, downsampled again
+        self.window = (x_min, x_max)
+        return self.refresh()
@@ -0,0 +1,176 @@
+import argparse
+import importlib
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from render_all import QUALITIES, ROOT, _prepare_process
+
+# Opt-in Chrome trace of a scene render.
+#
+#   python tracing.py cosine_similarity.CosineSimilarityMusicRec -o music.json
+#
+# Open the file in chrome://tracing or https://ui.perfetto.dev. While tracing,
+# these calls are recorded as nested spans:
+#   scene      Scene.construct, and each play / wait call
+#   layout     compiling and setting up the animations of a play call
+#   mobject    building Text, MathTex, Axes, NumberPlane and ImageMobject
+#   raster     CairoRenderer.update_frame (drawing one frame)
+#   encode     SceneFileWriter.write_frame and combining the partial movies
+# Every span carries the file and line in this repo that triggered it, so a
+# slow play call or label can be found in the scene source.
+
+MOBJECT_CLASSES = ["Text", "MathTex", "Axes", "NumberPlane", "ImageMobject"]
+
+
+def _source_location():
+    # File and line of the innermost frame in a repo module other than this one
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename != __file__ and filename.startswith(str(ROOT)) and "site-packages" not in filename:
+            return {"file": os.path.relpath(filename, ROOT), "line": frame.f_lineno}
+        frame = frame.f_back
+    return {}
+
+
+class Tracer:
+    def __init__(self):
+        self.events = []
+        self.pid = os.getpid()
+        self._origin = time.perf_counter()
+        self._restore = []
+
+    def _now(self):
+        return (time.perf_counter() - self._origin) * 1e6
+
+    @contextmanager
+    def span(self, name, category, args=None):
+        start = self._now()
+        try:
+            yield
+        finally:
+            self.events.append({
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": start,
+                "dur": self._now() - start,
+                "pid": self.pid,
+                "tid": threading.get_ident(),
+                "args": args or {},
+            })
+
+    def wrap(self, owner, attribute, category, describe=None):
+        # Replace owner.attribute with a traced version until uninstall().
+        # describe(self, *args, **kwargs) -> (name, extra args) names the span.
+        original = getattr(owner, attribute, None)
+        if original is None:
+            return  # not present in this manim version
+        tracer = self
+        default_name = f"{getattr(owner, '__name__', type(owner).__name__)}.{attribute}"
+
+        def traced(*args, **kwargs):
+            name, extra = describe(*args, **kwargs) if describe else (default_name, {})
+            with tracer.span(name, category, {**_source_location(), **extra}):
+                return original(*args, **kwargs)
+
+        setattr(owner, attribute, traced)
+        self._restore.append((owner, attribute, original))
+
+    def install(self):
+        import manim
+        from manim import Scene
+        from manim.renderer.cairo_renderer import CairoRenderer
+        from manim.scene.scene_file_writer import SceneFileWriter
+
+        def describe_play(scene, *animations, **kwargs):
+            names = [type(animation).__name__ for animation in animations]
+            return "play", {"animations": names}
+
+        def describe_wait(scene, duration=1.0, *args, **kwargs):
+            return "wait", {"duration": duration}
+
+        def describe_mobject(mobject, *args, **kwargs):
+            extra = {"text": args[0][:40]} if args and isinstance(args[0], str) else {}
+            return type(mobject).__name__, extra
+
+        self.wrap(Scene, "play", "scene", describe_play)
+        self.wrap(Scene, "wait", "scene", describe_wait)
+        self.wrap(Scene, "compile_animation_data", "layout")
+        self.wrap(Scene, "begin_animations", "layout")
+        for class_name in MOBJECT_CLASSES:
+            self.wrap(getattr(manim, class_name), "__init__", "mobject", describe_mobject)
+        self.wrap(CairoRenderer, "update_frame", "raster")
+        self.wrap(SceneFileWriter, "write_frame", "encode")
+        self.wrap(SceneFileWriter, "combine_to_movie", "encode")
+
+    def uninstall(self):
+        while self._restore:
+            owner, attribute, original = self._restore.pop()
+            setattr(owner, attribute, original)
+
+    def save(self, path):
+        path = Path(path)
+        path.write_text(json.dumps({"traceEvents": self.events, "displayTimeUnit": "ms"}))
+        return path
+
+
+@contextmanager
+def tracing(path=None):
+    # Records every traced call made inside the block; written to `path` if given
+    tracer = Tracer()
+    tracer.install()
+    try:
+        yield tracer
+    finally:
+        tracer.uninstall()
+        if path is not None:
+            tracer.save(path)
+
+
+def trace_scene(scene_id, output, quality="low_quality", media_dir=ROOT / "media"):
+    _prepare_process()
+    from manim import tempconfig
+
+    module_name, class_name = scene_id.rsplit(".", 1)
+    scene_cls = getattr(importlib.import_module(module_name), class_name)
+    with tempconfig({
+        "quality": quality,
+        "media_dir": str(media_dir),
+        "disable_caching": True,
+        "progress_bar": "none",
+        "verbosity": "WARNING",
+    }), tracing(output) as tracer:
+        scene = scene_cls()
+        # Scene.render calls the bound method, so trace it on the instance
+        construct = scene.construct
+
+        def traced_construct():
+            with tracer.span("construct", "scene", {"scene": scene_id}):
+                construct()
+
+        scene.construct = traced_construct
+        scene.render()
+    return output
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render one scene and write a Chrome trace of it.")
+    parser.add_argument("scene", help="scene to trace (module.Class)")
+    parser.add_argument("-o", "--output", default=None, help="trace file (default: <Class>.trace.json)")
+    parser.add_argument("-q", "--quality", choices=sorted(QUALITIES), default="l")
+    parser.add_argument("--media-dir", default=str(ROOT / "media"))
+    args = parser.parse_args(argv)
+
+    output = args.output or f"{args.scene.rsplit('.', 1)[1]}.trace.json"
+    trace_scene(args.scene, output, QUALITIES[args.quality], Path(args.media_dir))
+    print(f"Wrote {output}")
+
+
+if __name__ == "__main__":
+    main()